@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+""" Error bounds and cost per call of the astro accuracy tiers.
+
+    Usage: python benchmarks/bench_accuracy.py
+
+    The reference table lists published instants (UT, rounded to the
+    minute) of new and full moons, most of them eclipses.  For each tier
+    we report the error of truephase() on these instants, and the error
+    of phase() expressed as the time the Moon takes to make up the
+    elongation it gets wrong, both in minutes.  phasehunt2() is timed on
+    dates a lunation apart with the truephase() cache emptied first, so
+    that it measures the computation of the phases, not cache hits.
+"""
+
+import os
+import sys
+import timeit
+import calendar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position,protected-access
+from src.lib.astro import (ACCURACIES, SYNMONTH, unix_to_julian, phase, truephase, phasehunt2,
+                           _truephase)
+
+# (UT, phase selector)
+REFERENCE = (
+    ('1999-08-11 11:08', 0.0),
+    ('2000-01-06 18:14', 0.0),
+    ('2000-01-21 04:40', 0.5),
+    ('2017-08-21 18:30', 0.0),
+    ('2018-07-27 20:20', 0.5),
+    ('2019-01-21 05:16', 0.5),
+    ('2020-06-21 06:41', 0.0),
+    ('2021-05-26 11:14', 0.5),
+    ('2022-11-08 11:02', 0.5),
+    ('2023-10-14 17:55', 0.0),
+    ('2024-04-08 18:21', 0.0),
+    ('2025-03-14 06:55', 0.5),
+)
+
+ELONGATIONRATE = 360.0 / SYNMONTH  # degrees per day
+
+
+def reference_dates():
+    """ Julian dates of the reference table
+    """
+    for text, moonphase in REFERENCE:
+        stamp = calendar.timegm(tuple(int(x) for x in text.replace('-', ' ').replace(':', ' ').split())
+                                + (0, 0, 0, 0))
+        yield unix_to_julian(stamp), moonphase
+
+
+def errors(accuracy):
+    """ Return the (truephase, phase) errors in minutes, one per reference
+    """
+    for juliandate, moonphase in reference_dates():
+        k = round((juliandate - 2415020.75933) / SYNMONTH - moonphase)
+        event_error = (truephase(float(k), moonphase, accuracy) - juliandate) * 1440.0
+
+        elongation = phase(juliandate, accuracy)[0] * 360.0 - moonphase * 360.0
+        elongation = (elongation + 180.0) % 360.0 - 180.0
+        phase_error = -elongation / ELONGATIONRATE * 1440.0
+        yield event_error, phase_error
+
+
+def main():
+    """ Run the benchmark
+    """
+    print(f"{'tier':8} {'truephase error':>20} {'phase error':>20} {'phase()':>10} {'phasehunt2()':>13}")
+    print(f"{'':8} {'max / mean (minutes)':>20} {'max / mean (minutes)':>20} {'us/call':>10} "
+          f"{'us/call':>13}")
+    for accuracy in ACCURACIES:
+        event_errors, phase_errors = zip(*errors(accuracy))
+        event_max = max(abs(err) for err in event_errors)
+        event_mean = sum(abs(err) for err in event_errors) / len(event_errors)
+        phase_max = max(abs(err) for err in phase_errors)
+        phase_mean = sum(abs(err) for err in phase_errors) / len(phase_errors)
+
+        number = 2000
+        dates = [2460000.0 + i * 0.37 for i in range(number)]
+        phase_cost = timeit.timeit(lambda: [tuple(phase(jd, accuracy)) for jd in dates], number=1)
+        # One lunation apart: every call computes its phases
+        hunt_dates = [2415020.0 + i * SYNMONTH for i in range(number)]
+        _truephase.cache_clear()
+        hunt_cost = timeit.timeit(lambda: [phasehunt2(jd, accuracy) for jd in hunt_dates], number=1)
+
+        print(f"{accuracy:8} {event_max:9.2f} / {event_mean:7.2f} "
+              f"{phase_max:11.2f} / {phase_mean:6.2f} "
+              f"{phase_cost / number * 1e6:10.2f} {hunt_cost / number * 1e6:13.2f}")
+
+
+if __name__ == '__main__':
+    main()
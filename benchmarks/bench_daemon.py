@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+""" Compare cold `pyphoon` runs with runs served by `pyphoon --daemon`.
+
+    Usage: python benchmarks/bench_daemon.py [RUNS]
+
+    Three numbers are reported:
+
+      cold      a fresh interpreter importing and rendering everything
+      daemon    a fresh interpreter forwarding its argv to the daemon
+      forward   the client round trip alone, from an already running
+                interpreter (what a shell-less embedder would see)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.lib import client  # pylint: disable=wrong-import-position
+
+ENTRY = 'import src; src.main()'
+ARGV = ['-n', '23', '2024-03-25 12:00']
+
+
+def timed_runs(runs, env):
+    """ Run the entry point runs times, return the mean wall time in ms
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, '-c', ENTRY] + ARGV, env=env, cwd=ROOT,
+                       check=True, stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000.0 / runs
+
+
+def main():
+    """ Run the benchmark
+    """
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        env[client.SOCKET_ENV] = os.path.join(tmpdir, 'pyphoon.sock')
+        cold_env = dict(env, **{client.NODAEMON_ENV: '1'})
+
+        daemon = subprocess.Popen([sys.executable, '-c', ENTRY, '--daemon'], env=env, cwd=ROOT)
+        try:
+            while not os.path.exists(env[client.SOCKET_ENV]):
+                time.sleep(0.01)
+
+            cold = timed_runs(runs, cold_env)
+            warm = timed_runs(runs, env)
+
+            os.environ[client.SOCKET_ENV] = env[client.SOCKET_ENV]
+            devnull = open(os.devnull, 'w')  # pylint: disable=consider-using-with
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                start = time.perf_counter()
+                for _ in range(runs * 50):
+                    client.forward(ARGV)
+                forward = (time.perf_counter() - start) * 1000.0 / (runs * 50)
+            finally:
+                sys.stdout = stdout
+                devnull.close()
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"cold    {cold:8.3f} ms/run")
+    print(f"daemon  {warm:8.3f} ms/run")
+    print(f"forward {forward:8.3f} ms/run")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+""" Eclipse candidate search, vectorized and a syzygy at a time.
+
+    Usage: python benchmarks/bench_eclipse.py [CENTURIES]
+
+    Scans CENTURIES centuries (5 by default) from 1900 with
+    src.lib.eclipse, with NumPy and with the scalar fallback (as if
+    NumPy were missing), and reports the wall times and the candidates
+    found.
+    Then checks that the eclipses of 2024 to 2026 are all found, on the
+    dates (UTC) of the NASA catalogues.
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from src.lib import vastro
+from src.lib.eclipse import eclipses
+
+START = 2415020.5  # 1900-01-01
+CENTURY = 36524.25
+
+# 2024 to 2026, penumbral lunar eclipses included
+KNOWN = (
+    ('2024-03-25', 'lunar'), ('2024-04-08', 'solar'), ('2024-09-18', 'lunar'),
+    ('2024-10-02', 'solar'), ('2025-03-14', 'lunar'), ('2025-03-29', 'solar'),
+    ('2025-09-07', 'lunar'), ('2025-09-21', 'solar'), ('2026-02-17', 'solar'),
+    ('2026-03-03', 'lunar'), ('2026-08-12', 'solar'), ('2026-08-28', 'lunar'),
+)
+KNOWNSTART, KNOWNEND = 2460310.5, 2461406.5  # 2024-01-01, 2027-01-01
+
+
+def timed(end, vectorized):
+    """ Candidates from START to end, and the seconds taken (best of 3)
+    """
+    best = None
+    vastro.HAVE_NUMPY = vectorized
+    try:
+        for _ in range(3):
+            began = time.perf_counter()
+            found = eclipses(START, end)
+            elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        vastro.HAVE_NUMPY = True
+    return found, best
+
+
+def main():
+    """ Run the benchmark
+    """
+    centuries = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    end = START + CENTURY * centuries
+    vastro.require_numpy()
+
+    print(f"{'':10} {'time':>10} {'solar':>6} {'lunar':>6} {'penumbral':>10} {'certain':>8}")
+    for label, vectorized in (('vectorized', True), ('scalar', False)):
+        found, elapsed = timed(end, vectorized)
+        kinds = Counter(candidate.kind for candidate in found)
+        certain = sum(candidate.certain for candidate in found)
+        print(f"{label:10} {elapsed * 1e3:7.1f} ms {kinds['solar']:6} {kinds['lunar']:6} "
+              f"{kinds['penumbral']:10} {certain:8}")
+
+    found = {(time.strftime('%Y-%m-%d', time.gmtime(candidate.timestamp)),
+              'solar' if candidate.kind == 'solar' else 'lunar')
+             for candidate in eclipses(KNOWNSTART, KNOWNEND)}
+    missed = [event for event in KNOWN if event not in found]
+    print(f"2024-2026: {len(KNOWN) - len(missed)} of {len(KNOWN)} eclipses found, "
+          f"{len(found) - len(KNOWN) + len(missed)} candidates without one, missed: {missed or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+""" Inverse queries against dense sampling of phase().
+
+    Usage: python benchmarks/bench_inverse.py [YEARS]
+
+    Finds the instants of age = 3 days and of 90% illumination over YEARS
+    years (1 by default) with src.lib.inverse, then by sampling
+    vastro.phase() every minute and keeping the sign changes.  Reported
+    are the wall times, the residuals of the solutions (days of age,
+    fraction of the disc) and the largest distance between both answers.
+
+    Then, as a regression check, searches the illumination crossings
+    from starts near the end of the new-to-full and full-to-new segments
+    longer than half a synodic month, more than half a month after the
+    boundary before them, and compares them with sampling every minute.
+    Exits with status 1 on a mismatch.
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from src.lib import vastro
+from src.lib.astro import phase, SYNMONTH
+from src.lib.inverse import age_times, illumination_times, phase_times
+
+START = 2461406.5  # 2027-01-01
+AGE = 3.0
+ILLUMINATION = 0.9
+
+
+def sampled(end, step):
+    """ Age and illumination crossings found on a grid, with the time
+        taken, as (ages, illuminations, seconds)
+    """
+    np = vastro.np
+    began = time.perf_counter()
+    ages, illuminations = [], []
+    chunk = 200000
+    first = START
+    while first < end:
+        grid = first + np.arange(chunk + 1) * step
+        grid = grid[grid < end + step]
+        _, illuminated, age, _, _, _, _ = vastro.phase(grid)
+        ages.extend(grid[1:][(age[:-1] < AGE) & (age[1:] >= AGE)].tolist())
+        above = illuminated >= ILLUMINATION
+        illuminations.extend(grid[1:][above[:-1] != above[1:]].tolist())
+        first = grid[-1]
+    return ages, illuminations, time.perf_counter() - began
+
+
+def long_segment_ends(end):
+    """ Mismatches between illumination_times() and a one minute grid,
+        from starts near the end of the long segments up to end, and the
+        number of segments checked
+    """
+    np = vastro.np
+    boundaries = sorted(list(phase_times(0.0, START, end)) + list(phase_times(0.5, START, end)))
+    mismatches, checked = [], 0
+    for lower, upper in zip(boundaries, boundaries[1:]):
+        # A start more than half a month after the boundary before it
+        start = lower + SYNMONTH / 2 + 0.01
+        if upper - start < 0.05:
+            continue
+        checked += 1
+        grid = start + np.arange(int((upper - start) * 1440)) / 1440.0
+        illuminated = vastro.phase(grid)[1]
+        # Between two samples, so that the grid brackets the crossing
+        target = float(illuminated[len(grid) // 2:len(grid) // 2 + 2].mean())
+        above = illuminated >= target
+        expected = grid[1:][above[:-1] != above[1:]].tolist()
+        found = list(illumination_times(target, start, upper))
+        if len(found) != len(expected) or any(abs(a - b) > 1 / 1440.0
+                                              for a, b in zip(found, expected)):
+            mismatches.append((start, target, found, expected))
+    return mismatches, checked
+
+
+def main():
+    """ Run the benchmark
+    """
+    years = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    end = START + 365.25 * years
+    vastro.require_numpy()
+
+    began = time.perf_counter()
+    ages = list(age_times(AGE, START, end))
+    illuminations = list(illumination_times(ILLUMINATION, START, end))
+    solved = time.perf_counter() - began
+
+    grid_ages, grid_illuminations, grid_time = sampled(end, 1 / 1440.0)
+
+    age_residual = max(abs(phase(jd).age - AGE) for jd in ages)
+    illumination_residual = max(abs(phase(jd).illuminated - ILLUMINATION) for jd in illuminations)
+    gap = max(abs(a - b) for a, b in zip(ages + illuminations, grid_ages + grid_illuminations))
+
+    print(f"{'':16} {'roots':>6} {'time':>10} {'residual age / illum.':>24}")
+    print(f"{'inverse':16} {len(ages) + len(illuminations):6} {solved * 1e3:8.1f} ms "
+          f"{age_residual:11.1e} / {illumination_residual:.1e}")
+    print(f"{'1 minute grid':16} {len(grid_ages) + len(grid_illuminations):6} {grid_time * 1e3:8.1f} ms")
+    print(f"largest difference between both: {gap * 1440:.2f} min")
+
+    mismatches, checked = long_segment_ends(end)
+    print(f"ends of long segments: {checked} checked, {len(mismatches)} mismatches")
+    for start, target, found, expected in mismatches:
+        print(f"  from {start:.5f}, illuminated {target:.6f}: {found} instead of {expected}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+""" Fan-out of the live publisher to many subscribers.
+
+    Usage: python benchmarks/bench_publish.py [FRAMES] [SUBSCRIBERS ...]
+
+    First times the computation of the frames themselves, with and without
+    text: finding the next instant the output changes and rendering it.
+    Then, for each number of subscribers, a child process connects them
+    to a Publisher over a Unix socket, plus one which never reads, and the
+    publisher pushes FRAMES frames (500 by default) as fast as they are
+    taken.  Reported are the publisher's CPU time per frame, split between
+    the frame (rendered and encoded once) and the delivery, and the frames
+    dropped for the stalled subscriber, which never holds up the others.
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from src.pyphoon import MoonRenderer
+from src.lib import publish
+from src.lib.publish import Publisher, Frame
+
+START = 1700000000.0
+
+
+def frame_cost(renderer, count):
+    """ Seconds per frame and mean seconds between changes, over count
+        consecutive changes from START
+    """
+    publisher = Publisher(renderer)
+    timestamp = START
+    began = time.process_time()
+    for _ in range(count):
+        timestamp = publisher.next_change(timestamp)
+        publisher.render(timestamp)
+    return (time.process_time() - began) / count, (timestamp - START) / count
+
+
+def subscribe(path, count, frames):
+    """ Child process: count subscribers reading server-sent events and
+        a stalled one; exit with status 0 if every reader got the last frame
+    """
+    stalled = socket.socket(socket.AF_UNIX)
+    stalled.connect(path)
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    readers = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_UNIX)
+        sock.settimeout(60)
+        sock.connect(path)
+        sock.sendall(b'GET / HTTP/1.1\r\n\r\n')
+        readers.append(sock)
+    last = f'id: {frames:.3f}'.encode()
+    done = 0
+    for sock in readers:
+        data = b''
+        while last not in data:
+            try:
+                chunk = sock.recv(1 << 20)
+            except OSError:
+                chunk = b''
+            if not chunk:
+                break
+            data = data[-64:] + chunk
+        done += last in data
+    os._exit(0 if done == count else 1)  # pylint: disable=protected-access
+
+
+async def fan_out(renderer, subscribers, frames):
+    """ CPU seconds per frame spent by the publisher rendering and
+        encoding, and delivering; frames dropped
+    """
+    publisher = Publisher(renderer)
+    path = os.path.join(tempfile.mkdtemp(), 'publish.sock')
+    server = await asyncio.start_unix_server(publisher.handle, path)
+    # Frames identified by their index: the child looks for the last one
+    timestamps = [float(idx) for idx in range(1, frames + 1)]
+    texts = [renderer.render(START + idx * 60) for idx in range(frames)]
+
+    pid = os.fork()
+    if pid == 0:
+        subscribe(path, subscribers, frames)
+    while publisher.subscribers < subscribers + 1:
+        await asyncio.sleep(0.01)
+    # Every subscriber is past the HTTP handshake wait
+    await asyncio.sleep(publish.HANDSHAKE * 2)
+
+    dropped = publish.DROPPED.samples()[0][2]
+    making = delivering = 0.0
+    for timestamp, text in zip(timestamps, texts):
+        began = time.process_time()
+        frame = Frame(timestamp, text)
+        frame.sse()
+        frame.plain()
+        made = time.process_time()
+        publisher.broadcast(frame)
+        await asyncio.sleep(0)  # let the writer tasks run
+        delivering += time.process_time() - made
+        making += made - began
+    _, status = await asyncio.get_running_loop().run_in_executor(None, os.waitpid, pid, 0)
+    server.close()
+    return making / frames, delivering / frames, publish.DROPPED.samples()[0][2] - dropped, status
+
+
+def main():
+    """ Run the benchmark
+    """
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    counts = [int(arg) for arg in sys.argv[2:]] or [1, 10, 100]
+
+    for notext in (False, True):
+        renderer = MoonRenderer(notext=notext)
+        cost, interval = frame_cost(renderer, 200 if notext else 2000)
+        label = 'without text' if notext else 'with text'
+        print(f"frames {label:12}: {cost * 1e6:7.0f} us each, one every {interval:7.1f} s")
+
+    renderer = MoonRenderer(notext=True)
+    print(f"{'subscribers':>11} {'frame':>10} {'delivery':>10} {'per sub.':>9} {'dropped':>8}")
+    for count in counts:
+        making, delivering, dropped, status = asyncio.run(fan_out(renderer, count, frames))
+        if status:
+            print(f"{count}: some subscribers missed frames")
+        print(f"{count:11} {making * 1e6:7.1f} us {delivering * 1e6:7.1f} us "
+              f"{delivering / (count + 1) * 1e6:6.1f} us {dropped:8}")
+
+
+if __name__ == '__main__':
+    main()
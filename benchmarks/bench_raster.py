@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+""" Scalar and NumPy raster drawing of large moons.
+
+    Usage: python benchmarks/bench_raster.py [LINES ...]
+
+    Times MoonRenderer.edges() and draw() for a few phases at each size,
+    with the default '@' and with a two-character filler, drawn by the
+    scalar code and by src.lib.raster (which MoonRenderer only picks for
+    fillers, from RASTERTHRESHOLD lines).
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from src import pyphoon
+from src.lib import raster
+from src.pyphoon import MoonRenderer
+
+PHASES = (0.1, 0.3, 0.6, 0.9)
+
+
+def scalar_renderer(numlines, atfiller):
+    """ MoonRenderer which never uses the raster engine
+    """
+    threshold = pyphoon.RASTERTHRESHOLD
+    pyphoon.RASTERTHRESHOLD = float('inf')
+    try:
+        return MoonRenderer(numlines, atfiller, True)
+    finally:
+        pyphoon.RASTERTHRESHOLD = threshold
+
+
+def per_frame(renderer, draw):
+    """ Time to compute the edges and draw a frame, seconds
+    """
+    number = max(3, 20000 // renderer.numlines)
+
+    def frames():
+        for pctphase in PHASES:
+            draw(renderer.edges(pctphase))
+    return timeit.timeit(frames, number=number) / number / len(PHASES)
+
+
+def main():
+    """ Run the benchmark
+    """
+    raster.np.ones(1)  # keep NumPy's start-up out of the timings
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 100, 200, 500, 1000]
+    print(f"{'lines':>6} {'@ scalar':>10} {'*# scalar':>11} {'*# raster':>11}")
+    for numlines in sizes:
+        plain = scalar_renderer(numlines, '@')
+        scalar = scalar_renderer(numlines, '*#')
+        vector = MoonRenderer(numlines, '*#', True)
+        times = (
+            per_frame(plain, lambda shape: plain.draw(shape, None)),
+            per_frame(scalar, lambda shape: scalar.draw(shape, None)),
+            per_frame(vector, lambda shape: vector.draw(shape, None)),
+        )
+        print(f"{numlines:6} " + ' '.join(f'{value * 1e3:8.2f} ms' for value in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+""" Pre-forked workers rendering with and without a SharedCache.
+
+    Usage: python benchmarks/bench_shmcache.py [WORKERS] [REQUESTS]
+
+    Each worker renders REQUESTS moons for random instants taken among a
+    day of seconds, as a web front end asked for "the moon now" would.
+    Reported are the wall time of the whole run and, with the shared
+    cache, its hit rate and the hit latency of a single get().
+"""
+
+import os
+import sys
+import time
+import random
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from src.pyphoon import MoonRenderer
+from src.lib.shmcache import SharedCache
+
+START = 1700000000
+SECONDS = 86400
+
+
+def work(renderer, requests, seed):
+    """ Render requests random instants
+    """
+    rand = random.Random(seed)
+    for _ in range(requests):
+        renderer.render(START + rand.random() * SECONDS)
+
+
+def run(workers, requests, cache):
+    """ Fork workers running work(), return the wall time in seconds
+    """
+    renderer = MoonRenderer(lang='en', cache=cache)
+    start = time.perf_counter()
+    pids = []
+    for seed in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            work(renderer, requests, seed)
+            os._exit(0)  # pylint: disable=protected-access
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return time.perf_counter() - start
+
+
+def main():
+    """ Run the benchmark
+    """
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    private = run(workers, requests, None)
+    print(f"{workers} workers x {requests} renders, private caches: {private:.2f} s")
+
+    with SharedCache() as cache:
+        shared = run(workers, requests, cache)
+        stats = cache.stats()
+        total = stats['hits'] + stats['misses']
+        key = b'probe'
+        cache.put(key, b'x' * 1500)
+        hit = timeit.timeit(lambda: cache.get(key), number=20000) / 20000
+    print(f"{workers} workers x {requests} renders, shared cache:   {shared:.2f} s "
+          f"({stats['hits'] / total:.0%} hits, {stats['evictions']} evictions, "
+          f"{hit * 1e6:.1f} us per hit)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+""" pyphoon --status against the full render.
+
+    Usage: python benchmarks/bench_status.py [RUNS]
+
+    Times RUNS cold invocations of the pyphoon entry point (a new
+    interpreter each, as a status bar would spawn, without the daemon)
+    with --status and with the default moon, next to a bare interpreter,
+    then the same two outputs computed in-process for a new instant each
+    time.
+"""
+
+import os
+import sys
+import time
+import timeit
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from src.status import status_line
+from src.pyphoon import MoonRenderer
+
+START = 1700000000
+ENTRY = 'import sys; sys.argv[0] = "pyphoon"; import src; src.main()'
+
+
+def cold(args, runs, entry=ENTRY):
+    """ Median wall time of runs invocations of pyphoon args, seconds
+    """
+    env = dict(os.environ, PYPHOON_NO_DAEMON='1',
+               PYTHONPATH=os.pathsep.join(filter(None, (ROOT, os.environ.get('PYTHONPATH')))))
+    command = [sys.executable, '-c', entry] + args
+    subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)  # warm the pyc files
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def warm(func, number=2000):
+    """ Time per call of func(timestamp), each call a new minute, seconds
+    """
+    stamps = iter(range(START, START + 60 * (number + 1), 60))
+    return timeit.timeit(lambda: func(next(stamps)), number=number) / number
+
+
+def main():
+    """ Run the benchmark
+    """
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    renderer = MoonRenderer(lang='en')
+
+    print(f"{'':14} {'cold':>10} {'in-process':>12}")
+    print(f"{'python -c pass':14} {cold([], runs, 'pass') * 1e3:7.1f} ms")
+    print(f"{'--status':14} {cold(['--status'], runs) * 1e3:7.1f} ms "
+          f"{warm(lambda stamp: status_line(stamp, lang='en')) * 1e6:9.1f} us")
+    print(f"{'full render':14} {cold([], runs) * 1e3:7.1f} ms "
+          f"{warm(renderer.render) * 1e6:9.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,13 +12,17 @@ setup(
     version='0.2',
     entry_points={
         'console_scripts': [
-            'pyphoon=src:main'
+            'pyphoon=src:main',
+            'pyphoon-export=src.export:main',
         ],
     },
     scripts=['src/bin/pyphoon-lolcat'],
     packages=find_packages(),
     install_requires=[
         'python-dateutil'
-    ]
+    ],
+    extras_require={
+        'numpy': ['numpy'],
+    }
 )
 
@@ -0,0 +1,198 @@
+""" pyphoon-export - dump phase() over a time range
+
+    Computes astro.phase() every STEP over [START, END) and streams the
+    result, chunk by chunk, to a CSV file or to a .npy file (float64, one
+    row per instant, stored column by column).  Memory use is bounded by
+    the chunk size whatever the length of the range, and chunks (CSV
+    formatting included) may be spread over worker processes.
+"""
+
+import os
+import sys
+import argparse
+from multiprocessing import Pool
+
+from src.lib.astro import unix_to_julian, phase, ACCURACIES
+from src.lib import astro, vastro
+from src.lib.dates import parse_timestamp
+
+COLUMNS = (
+    'julian_date', 'phase', 'illuminated', 'age',
+    'distance', 'angular_diameter', 'sun_distance', 'sun_angular_diameter',
+)
+
+CSV_FORMAT = '%.8f,%.8f,%.8f,%.8f,%.3f,%.8f,%.1f,%.8f\n'
+
+DEFAULTCHUNK = 65536
+
+STEP_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def fatal(message):
+    """ Print error message and exit signaling failure
+    """
+    print(message, file=sys.stderr)
+    sys.exit(1)
+
+
+def parse_step(step):
+    """ Convert '90', '90s', '15m', '1h' or '1d' to seconds
+    """
+    unit = STEP_UNITS.get(step[-1:])
+    if unit is None:
+        return float(step)
+    return float(step[:-1]) * unit
+
+
+def compute_chunk(job):
+    """ Return the rows for count instants from jd0, every step days.
+
+        job is (jd0, step, count, accuracy); rows are a float64 array
+        shaped (count, len(COLUMNS)), or a list of tuples without NumPy or
+        at another accuracy than the default one.
+    """
+    jd0, step, count, accuracy = job
+    if vastro.HAVE_NUMPY and accuracy == 'default':
+        np = vastro.np
+        juliandates = jd0 + np.arange(count, dtype=np.float64) * step
+        return np.column_stack((juliandates,) + vastro.phase(juliandates))
+    juliandates = (jd0 + i * step for i in range(count))
+    return [(juliandate,) + tuple(phase(juliandate, accuracy)) for juliandate in juliandates]
+
+
+def format_chunk(job):
+    """ compute_chunk() rendered as CSV lines
+    """
+    rows = compute_chunk(job)
+    if hasattr(rows, 'tolist'):
+        rows = rows.tolist()
+    return ''.join(CSV_FORMAT % tuple(row) for row in rows)
+
+
+def jobs(jd0, step, total, chunk, accuracy=None):
+    """ Split total instants from jd0 into (jd0, step, count, accuracy)
+        chunks.  The accuracy (ACCURACY by default) is carried along for
+        the worker processes.
+    """
+    accuracy = accuracy or astro.ACCURACY
+    for first in range(0, total, chunk):
+        yield (jd0 + first * step, step, min(chunk, total - first), accuracy)
+
+
+def available_cpus():
+    """ Number of CPUs this process may run on
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _imap(func, iterable, workers):
+    """ map() over worker processes if asked to, keeping the order.
+        There are never more workers than CPUs to run them: the extra
+        ones would only add their startup and the pickling of results.
+    """
+    workers = min(workers, available_cpus())
+    if workers <= 1:
+        yield from map(func, iterable)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(func, iterable)
+
+
+def export_csv(stream, jd0, step, total, chunk=DEFAULTCHUNK, workers=1, accuracy=None):  # pylint: disable=too-many-arguments
+    """ Write total rows of CSV, from jd0 every step days, to stream
+    """
+    stream.write(','.join(COLUMNS) + '\n')
+    for text in _imap(format_chunk, jobs(jd0, step, total, chunk, accuracy), workers):
+        stream.write(text)
+
+
+def export_npy(path, jd0, step, total, chunk=DEFAULTCHUNK, workers=1, accuracy=None):  # pylint: disable=too-many-arguments
+    """ Write a (total, len(COLUMNS)) float64 .npy file, from jd0 every
+        step days.  The file is memory-mapped and filled a chunk at a time.
+        It is in Fortran order, so that each column is contiguous on disk
+        and can be loaded (or memory-mapped) on its own.
+    """
+    vastro.require_numpy()
+    from numpy.lib.format import open_memmap  # pylint: disable=import-outside-toplevel
+    out = open_memmap(path, mode='w+', dtype='<f8', shape=(total, len(COLUMNS)),
+                      fortran_order=True)
+    first = 0
+    for rows in _imap(compute_chunk, jobs(jd0, step, total, chunk, accuracy), workers):
+        out[first:first + len(rows)] = rows
+        first += len(rows)
+    out.flush()
+    del out
+
+
+def main(argv=None):
+    """ Main entry point
+
+        :param argv: command line arguments, sys.argv[1:] by default
+    """
+    parser = argparse.ArgumentParser(
+        description='Export the phase of the Moon over a time range')
+    parser.add_argument('start', help='First instant of the range (included)')
+    parser.add_argument('end', help='End of the range (excluded)')
+    parser.add_argument(
+        '-t', '--step',
+        help="Time between two rows: seconds, or a number with an s/m/h/d suffix. 1m by default",
+        default='1m'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='Output file, .npy for binary output; CSV on stdout by default',
+        default='-'
+    )
+    parser.add_argument(
+        '-c', '--chunk',
+        help=f'Rows computed at a time. {DEFAULTCHUNK} by default',
+        type=int,
+        default=DEFAULTCHUNK
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        help='Number of worker processes, at most one per CPU. 1 by default',
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        '-a', '--accuracy',
+        help='Accuracy of the astronomical computations. default by default',
+        choices=ACCURACIES,
+        default='default'
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        start = parse_timestamp(args.start)
+        end = parse_timestamp(args.end)
+    except Exception:  # pylint: disable=broad-except
+        fatal(f"Can't parse date: {args.start} or {args.end}")
+
+    try:
+        step = parse_step(args.step)
+    except ValueError:
+        fatal(f"Can't parse step: {args.step}")
+    if step <= 0 or args.chunk <= 0:
+        fatal("Step and chunk size must be positive")
+
+    total = max(0, int(-(-(end - start) // step)))
+    jd0 = unix_to_julian(start)
+    stepdays = step / 86400.0
+
+    if args.output.endswith('.npy'):
+        try:
+            export_npy(args.output, jd0, stepdays, total, args.chunk, args.jobs, args.accuracy)
+        except ImportError as err:
+            fatal(str(err))
+    elif args.output == '-':
+        export_csv(sys.stdout, jd0, stepdays, total, args.chunk, args.jobs, args.accuracy)
+    else:
+        with open(args.output, 'w', encoding='ascii') as stream:
+            export_csv(stream, jd0, stepdays, total, args.chunk, args.jobs, args.accuracy)
+
+
+if __name__ == '__main__':
+    main()
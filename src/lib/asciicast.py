@@ -0,0 +1,133 @@
+""" Record the moon over a time span as an asciinema v2 file.
+
+    Frames are rendered with MoonRenderer from astronomy computed for all
+    of them in one pass.  A frame identical to the previous one is skipped,
+    and the others only carry cursor-addressed rewrites of the cells that
+    changed, which keeps a whole lunation small on disk.
+"""
+
+import json
+import time
+import unicodedata
+
+from src.lib import astro
+from src.lib.astro import unix_to_julian, terminator_phase, phasehunt2, SYNMONTH
+
+DEFAULTFRAMES = 600
+DEFAULTFPS = 30
+
+# Unchanged cells shorter than this between two changed runs are rewritten
+# anyway: a cursor move costs about as much
+MINGAP = 6
+
+CLEAR = '\x1b[2J\x1b[H'
+HIDECURSOR = '\x1b[?25l'
+SHOWCURSOR = '\x1b[?25h'
+
+
+def text_width(text):
+    """ Number of terminal columns taken by text
+    """
+    return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+
+
+def frame_lines(text):
+    """ Split a rendered moon into lines of terminal cells
+    """
+    return [line.expandtabs() for line in text.rstrip('\n').split('\n')]
+
+
+def diff_lines(old, new):
+    """ Escape sequences turning the old lines into the new ones
+    """
+    updates = []
+    for row in range(max(len(old), len(new))):
+        before = old[row] if row < len(old) else ''
+        after = new[row] if row < len(new) else ''
+        if before == after:
+            continue
+        length = max(len(before), len(after))
+        before = before.ljust(length)
+        after = after.ljust(length)
+
+        runs = []
+        for idx in range(length):
+            if before[idx] != after[idx]:
+                if runs and idx - runs[-1][1] <= MINGAP:
+                    runs[-1][1] = idx + 1
+                else:
+                    runs.append([idx, idx + 1])
+        for start, end in runs:
+            column = 1 + text_width(after[:start])
+            if text_width(before[:end]) != text_width(after[:end]):
+                # Wide characters moved the rest of the line: rewrite it all
+                updates.append(f'\x1b[{row + 1};{column}H{after[start:].rstrip()}\x1b[K')
+                break
+            updates.append(f'\x1b[{row + 1};{column}H{after[start:end]}')
+    return ''.join(updates)
+
+
+def julian_dates(start, frames, span):
+    """ Julian dates of frames instants from Unix time start over span days
+    """
+    jd0 = unix_to_julian(start)
+    step = span / frames
+    return [jd0 + i * step for i in range(frames)]
+
+
+def _vectorized(accuracy):
+    """ The vastro module if it can stand in for astro at this accuracy
+    """
+    if (accuracy or astro.ACCURACY) != 'default':
+        return None
+    from src.lib import vastro  # pylint: disable=import-outside-toplevel
+    return vastro if vastro.HAVE_NUMPY else None
+
+
+def phases_of(juliandates, accuracy=None):
+    """ Terminator phase at each of juliandates, in one pass
+    """
+    vastro = _vectorized(accuracy)
+    if vastro is not None:
+        return vastro.phase(vastro.np.array(juliandates))[0].tolist()
+    return [terminator_phase(juliandate, accuracy) for juliandate in juliandates]
+
+
+def record(stream, renderer, start, frames=DEFAULTFRAMES, span=SYNMONTH, fps=DEFAULTFPS):  # pylint: disable=too-many-arguments,too-many-locals
+    """ Write an asciicast of frames renders of renderer, from Unix time
+        start over span days, played at fps frames per second, to stream.
+        Return the number of frames actually written.
+    """
+    juliandates = julian_dates(start, frames, span)
+    pctphases = phases_of(juliandates)
+
+    events = []
+    previous = None
+    width = height = 0
+    for idx, (juliandate, pctphase) in enumerate(zip(juliandates, pctphases)):
+        phases, which = phasehunt2(juliandate)
+        lines = frame_lines(renderer.render_phase(juliandate, pctphase, phases, which))
+        if lines == previous:
+            continue
+
+        if previous is None:
+            data = HIDECURSOR + CLEAR + '\r\n'.join(lines)
+        else:
+            data = diff_lines(previous, lines)
+        events.append((idx / fps, data))
+        previous = lines
+        height = max(height, len(lines))
+        width = max([width] + [text_width(line) for line in lines])
+
+    header = {
+        'version': 2,
+        'width': width + 1,
+        'height': height + 1,
+        'timestamp': int(time.time()),
+        'title': 'pyphoon',
+    }
+    stream.write(json.dumps(header) + '\n')
+    for offset, data in events:
+        stream.write(json.dumps([round(offset, 6), 'o', data]) + '\n')
+    stream.write(json.dumps([round(frames / fps, 6), 'o', f'\x1b[{height + 1};1H' + SHOWCURSOR]) + '\n')
+    return len(events)
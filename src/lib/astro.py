@@ -33,7 +33,10 @@ Ported to Python by Igor Chubin, 2016
 from __future__ import print_function
 
 import sys
-from math import floor, sin, cos, sqrt, tan, atan, atan2
+from functools import lru_cache
+from math import floor, sin, cos, sqrt, tan, atan
+
+from src.lib import metrics
 
 #  Astronomical constants
 
@@ -67,6 +70,18 @@ EARTHRAD = 6378.16      # Radius of Earth in kilometres
 
 PI = 3.14159265358979323846  # Assume not near black hole nor in Tennessee
 
+#  Accuracy tiers of phase(), truephase() and the phase hunts:
+#
+#    default  the moontool algorithms described above
+#    precise  the full series of Meeus' "Astronomical Algorithms"
+#             (see src.lib.meeus), several times slower
+#
+#  See set_accuracy() and benchmarks/bench_accuracy.py for the error
+#  bounds and the cost of each tier.
+
+ACCURACIES = ('default', 'precise')
+ACCURACY = 'default'
+
 #  Handy mathematical functions
 
 def sgn(num):
@@ -98,6 +113,15 @@ def dcos(deg):
     return cos(torad((deg)))
 
 
+def set_accuracy(accuracy):
+    """ Select the accuracy tier used when none is given explicitly
+    """
+    global ACCURACY  # pylint: disable=global-statement
+    if accuracy not in ACCURACIES:
+        raise ValueError(f"unknown accuracy: {accuracy}")
+    ACCURACY = accuracy
+
+
 def fatal(error):
     """ Print error and exit 1
     """
@@ -113,6 +137,12 @@ def unix_to_julian(timestamp):
     return 1.0 * timestamp / 86400.0 + 2440587.4999996666666666666
 
 
+def julian_to_unix(juliandate):
+    """ Inverse of unix_to_julian()
+    """
+    return (juliandate - 2440587.4999996666666666666) * 86400.0
+
+
 def jyear(epoch):
     """ JYEAR  --  Convert Julian date to year, month, day, which are
          returned via integer pointers to integers.
@@ -161,12 +191,22 @@ def meanphase(sdate, k):
         + 0.00033 * dsin(166.56 + 132.87 * jul_time - 0.009173 * jul_time2)
     )
 
-def truephase(k, moonphase):
+def truephase(k, moonphase, accuracy=None):
     """ TRUEPHASE  --  Given a K value used to determine the
           mean phase of the new moon, and a phase
           selector (0.0, 0.25, 0.5, 0.75), obtain
           the true, corrected phase time.
   """
+    return _truephase(k, moonphase, accuracy or ACCURACY)
+
+
+@lru_cache(maxsize=1024)
+def _truephase(k, moonphase, accuracy):
+    """ truephase() for an explicit accuracy tier
+    """
+    if accuracy == 'precise':
+        from src.lib import meeus  # pylint: disable=import-outside-toplevel
+        return meeus.truephase(k, moonphase)
 
     apcor = False
 
@@ -256,12 +296,9 @@ def truephase(k, moonphase):
     return phasetime
 
 
-def phasehunt5(sdate):
-    """ PHASEHUNT5  --  Find time of phases of the moon which surround
-         the current date.  Five phases are found, starting
-         and ending with the new moons which bound the
-         current lunation.
-        Return phases (double[5])
+def lunation(sdate):
+    """ LUNATION  --  Find the K value (see meanphase()) of the lunation
+         which contains the date, i.e. of the new moon which starts it.
     """
 
     adate = sdate - 45
@@ -279,18 +316,45 @@ def phasehunt5(sdate):
             break
         new_time = newer_time
         var1 = var2
-    return [truephase(var1, x) for x in [0.0, 0.25, 0.5, 0.75]] + [truephase(var2, 0.0)]
+    return var1
 
 
-def phasehunt2(sdate):
+def lunation_phases(k, accuracy=None):
+    """ True times of the phases of lunation k: new moon, first quarter,
+        full moon, last quarter and the next new moon.
+        Return phases (double[5])
+    """
+    return ([truephase(k, x, accuracy) for x in [0.0, 0.25, 0.5, 0.75]]
+            + [truephase(k + 1, 0.0, accuracy)])
+
+
+def phasehunt5(sdate, accuracy=None):
+    """ PHASEHUNT5  --  Find time of phases of the moon which surround
+         the current date.  Five phases are found, starting
+         and ending with the new moons which bound the
+         current lunation.
+        Return phases (double[5])
+    """
+    return lunation_phases(lunation(sdate), accuracy)
+
+
+@metrics.timed('phasehunt2_seconds', 'Time spent in phasehunt2()')
+def phasehunt2(sdate, accuracy=None):
     """ PHASEHUNT2  --  Find time of phases of the moon which surround
          the current date.  Two phases are found.
         Return phases[2], which[2]
     """
+    return surrounding_phases(sdate, phasehunt5(sdate, accuracy))
+
+
+def surrounding_phases(sdate, phases5):
+    """ The two phases among phases5, as returned by phasehunt5(), which
+        surround the date.
+        Return phases[2], which[2]
+    """
     phases = [0, 0]
     which = [0, 0]
 
-    phases5 = phasehunt5(sdate)
     phases[0] = phases5[0]
     which[0] = 0.0
     phases[1] = phases5[1]
@@ -331,30 +395,12 @@ def kepler(angle, ecc):
     return theta
 
 
-def phase(pdate):  # pylint: disable=too-many-locals
-    """ PHASE  --  Calculate phase of moon as a fraction:
-
-         The argument is the time for which the phase is requested,
-         expressed as a Julian date and fraction.  Returns the terminator
-         phase angle as a percentage of a full circle (i.e., 0 to 1),
-         and stores into pointer arguments the illuminated fraction of
-             the Moon's disc, the Moon's age in days and fraction, the
-         distance of the Moon from the centre of the Earth, and the
-         angular diameter subtended by the Moon as seen by an observer
-         at the centre of the Earth.
-
-        pphase:      Illuminated fraction
-        mage:        Age of moon in days
-        dist:        Distance in kilometres
-        angdia:      Angular diameter in degrees
-        sudist:      Distance to Sun
-        suangdia:    Sun's angular diameter
-
-        Returns (phase, moon_phase, mage, dist, angdia, sudist, suangdia)
+def sun_position(pdate):
+    """ Calculation of the Sun's position, shared by the fields of
+        PhaseResult.  Return (day, epoch_1980, ecc, lambdasun): days since
+        EPOCH, mean anomaly and true anomaly of the Sun, and its
+        geocentric ecliptic longitude, in degrees.
     """
-
-    # Calculation of the Sun's position
-
     day = pdate - EPOCH  # Date within EPOCH
     sun_mean_anom = fixangle((360 / 365.2422) * day)  # Mean anomaly of the Sun
     epoch_1980 = fixangle(sun_mean_anom + ELONGE - ELONGP)  # Convert from perigee
@@ -364,18 +410,19 @@ def phase(pdate):  # pylint: disable=too-many-locals
     ecc = 2 * todeg(atan(ecc))  # True anomaly
     lambdasun = fixangle(ecc + ELONGP)  # Sun's geocentric ecliptic longitude
 
-    orbital_dist = ((1 + ECCENT * cos(torad(ecc))) / (1 - ECCENT * ECCENT))  # Orbital distance factor
-    sun_dist = SUNSMAX / orbital_dist                   # Distance to Sun in km
-    sun_ang = orbital_dist * SUNANGSIZ                  # Sun's angular size in degrees
+    return day, epoch_1980, ecc, lambdasun
 
-    # Calculation of the Moon's position
+
+def moon_position(sun):
+    """ Calculation of the Moon's position from sun_position().
+        Return (moon_anom_correct, centre_eq_correct, true_long), in degrees.
+    """
+    day, epoch_1980, _, lambdasun = sun
 
     moon_mean_long = fixangle(13.1763966 * day + MMLONG)  # Moon's mean longitude
 
     moon_mean_anom = fixangle(moon_mean_long - 0.1114041 * day - MMLONGP)  # Moon's mean anomaly
 
-    moon_asc_node_mean_long = fixangle(MLNODE - 0.0529539 * day)  # Moon's ascending node mean longitude
-
     evection = 1.2739 * sin(torad(2 * (moon_mean_long - lambdasun) - moon_mean_anom))  # Evection
 
     ann_eq = 0.1858 * sin(torad(epoch_1980))  # Annual equation
@@ -395,40 +442,234 @@ def phase(pdate):  # pylint: disable=too-many-locals
 
     true_long = long_correct + variation  # True longitude
 
-    node_long_correct = moon_asc_node_mean_long - 0.16 * sin(torad(epoch_1980))  # Corrected longitude of the node
+    return moon_anom_correct, centre_eq_correct, true_long
 
-    y_incline = sin(torad(true_long - node_long_correct)) * cos(torad(MINC))  # Y inclination coordinate
 
-    x_incline = cos(torad(true_long - node_long_correct))  # X inclination coordinate
+def node_position(sun):
+    """ Corrected longitude of the Moon's ascending node, in degrees, from
+        sun_position()
+    """
+    day, epoch_1980, _, _ = sun
+    moon_asc_node_mean_long = fixangle(MLNODE - 0.0529539 * day)  # Moon's ascending node mean longitude
+    return moon_asc_node_mean_long - 0.16 * sin(torad(epoch_1980))  # Corrected longitude of the node
 
-    lambdamoon = todeg(atan2(y_incline, x_incline))  # Ecliptic longitude
-    lambdamoon += node_long_correct
 
-    # Calculation of the phase of the Moon
+def node_distance(true_long, node_long):
+    """ Angular distance of the Moon's longitude from the nearest node of
+        its orbit, in degrees from -90 to 90, positive past the node.
+        Works on NumPy arrays too.
+    """
+    return (true_long - node_long + 90.0) % 180.0 - 90.0
 
-    moon_age = true_long - lambdasun  # Age of the Moon in degrees
 
-    moon_dist = (  # Calculate distance of moon from the centre of the Earth
-        (MSMAX * (1 - MECC * MECC))
-        / (1 + MECC * cos(torad(moon_anom_correct + centre_eq_correct)))
-    )
+class PhaseResult:
+    """ Phase of the moon at a Julian date, as returned by phase().
 
-    moon_diam_frac = moon_dist / MSMAX  # Calculate Moon's angular diameter
-    moon_ang = MANGSIZ / moon_diam_frac
+        Fields are computed on first access, from the Sun's and the Moon's
+        positions which are computed once and shared: reading the phase
+        alone never pays for the distances and sizes.  For backward
+        compatibility it also behaves as the tuple
+        (phase, moon_phase, mage, dist, angdia, sudist, suangdia).
+    """
+    __slots__ = ('pdate', 'accuracy', '_sun', '_moon', '_values')
+
+    FIELDS = ('phase', 'illuminated', 'age', 'distance', 'angular_diameter',
+              'sun_distance', 'sun_angular_diameter')
+
+    def __init__(self, pdate, accuracy=None):
+        self.pdate = pdate
+        self.accuracy = accuracy or ACCURACY
+        self._sun = self._moon = self._values = None
+        if self.accuracy == 'precise':
+            from src.lib import meeus  # pylint: disable=import-outside-toplevel
+            self._values = meeus.phase(pdate)
+
+    def _sun_position(self):
+        """ sun_position(), computed once
+        """
+        if self._sun is None:
+            self._sun = sun_position(self.pdate)
+        return self._sun
+
+    def _moon_position(self):
+        """ moon_position(), computed once
+        """
+        if self._moon is None:
+            self._moon = moon_position(self._sun_position())
+        return self._moon
+
+    def _moon_age(self):
+        """ Age of the Moon in degrees
+        """
+        return self._moon_position()[2] - self._sun_position()[3]
+
+    def _orbital_dist(self):
+        """ Sun's orbital distance factor
+        """
+        ecc = self._sun_position()[2]
+        return (1 + ECCENT * cos(torad(ecc))) / (1 - ECCENT * ECCENT)
+
+    @property
+    def phase(self):
+        """ Terminator phase angle as a fraction of a full circle (0 to 1)
+        """
+        if self._values is not None:
+            return self._values[0]
+        return fixangle(self._moon_age()) / 360.0
+
+    @property
+    def illuminated(self):
+        """ Illuminated fraction of the Moon's disc
+        """
+        if self._values is not None:
+            return self._values[1]
+        return (1 - cos(torad(self._moon_age()))) / 2
+
+    @property
+    def age(self):
+        """ Age of the Moon in days and fraction
+        """
+        if self._values is not None:
+            return self._values[2]
+        return SYNMONTH * (fixangle(self._moon_age()) / 360.0)
+
+    @property
+    def distance(self):
+        """ Distance of the Moon from the centre of the Earth, in km
+        """
+        if self._values is not None:
+            return self._values[3]
+        moon_anom_correct, centre_eq_correct, _ = self._moon_position()
+        return (
+            (MSMAX * (1 - MECC * MECC))
+            / (1 + MECC * cos(torad(moon_anom_correct + centre_eq_correct)))
+        )
 
-    moon_phase = (1 - cos(torad(moon_age))) / 2  # Phase of the Moon
-    mage = SYNMONTH * (fixangle(moon_age) / 360.0)
-    dist = moon_dist
-    angdia = moon_ang
-    sudist = sun_dist
-    suangdia = sun_ang
+    @property
+    def angular_diameter(self):
+        """ Angular diameter of the Moon seen from the centre of the Earth,
+            in degrees
+        """
+        if self._values is not None:
+            return self._values[4]
+        return MANGSIZ / (self.distance / MSMAX)
+
+    @property
+    def sun_distance(self):
+        """ Distance to the Sun in km
+        """
+        if self._values is not None:
+            return self._values[5]
+        return SUNSMAX / self._orbital_dist()
+
+    @property
+    def sun_angular_diameter(self):
+        """ Sun's angular diameter in degrees
+        """
+        if self._values is not None:
+            return self._values[6]
+        return self._orbital_dist() * SUNANGSIZ
+
+    @property
+    def node_longitude(self):
+        """ Longitude of the ascending node of the Moon's orbit, in degrees
+            (from the moontool positions, whatever the accuracy)
+        """
+        return node_position(self._sun_position())
+
+    @property
+    def node_distance(self):
+        """ Angular distance of the Moon from the nearest node of its
+            orbit, in degrees (-90 to 90): eclipses happen near 0
+        """
+        return node_distance(self._moon_position()[2], self.node_longitude)
+
+    def astuple(self):
+        """ All the fields at once, as phase() used to return them
+        """
+        if self._values is None:
+            moon_anom_correct, centre_eq_correct, true_long = self._moon_position()
+            moon_age = true_long - self._sun[3]
+            moon_dist = (
+                (MSMAX * (1 - MECC * MECC))
+                / (1 + MECC * cos(torad(moon_anom_correct + centre_eq_correct)))
+            )
+            orbital_dist = self._orbital_dist()
+            self._values = (
+                fixangle(moon_age) / 360.0,
+                (1 - cos(torad(moon_age))) / 2,
+                SYNMONTH * (fixangle(moon_age) / 360.0),
+                moon_dist,
+                MANGSIZ / (moon_dist / MSMAX),
+                SUNSMAX / orbital_dist,
+                orbital_dist * SUNANGSIZ,
+            )
+        return self._values
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __iter__(self):
+        return iter(self.astuple())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.astuple()[index]
+        return getattr(self, self.FIELDS[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (PhaseResult, tuple)):
+            return self.astuple() == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={value!r}' for name, value in zip(self.FIELDS, self.astuple()))
+        return f'PhaseResult({fields})'
+
+
+@metrics.timed('phase_seconds', 'Time spent in phase(), fields computed on access excluded')
+def phase(pdate, accuracy=None):
+    """ PHASE  --  Calculate phase of moon as a fraction:
 
-    return (
-        fixangle(moon_age) / 360.0,
-        moon_phase,
-        mage,
-        dist,
-        angdia,
-        sudist,
-        suangdia
-    )
+         The argument is the time for which the phase is requested,
+         expressed as a Julian date and fraction.  Returns the terminator
+         phase angle as a percentage of a full circle (i.e., 0 to 1),
+         and stores into pointer arguments the illuminated fraction of
+             the Moon's disc, the Moon's age in days and fraction, the
+         distance of the Moon from the centre of the Earth, and the
+         angular diameter subtended by the Moon as seen by an observer
+         at the centre of the Earth.
+
+        pphase:      Illuminated fraction
+        mage:        Age of moon in days
+        dist:        Distance in kilometres
+        angdia:      Angular diameter in degrees
+        sudist:      Distance to Sun
+        suangdia:    Sun's angular diameter
+
+        Returns a PhaseResult, which unpacks as
+        (phase, moon_phase, mage, dist, angdia, sudist, suangdia)
+        and computes each of them on first access only.
+
+        accuracy: tier (see ACCURACIES), ACCURACY by default
+    """
+    return PhaseResult(pdate, accuracy)
+
+
+@metrics.timed('terminator_phase_seconds', 'Time spent in terminator_phase()')
+def terminator_phase(pdate, accuracy=None):
+    """ Terminator phase angle at pdate as a fraction of a full circle,
+        i.e. phase(pdate)[0] without any of the distance and size math
+    """
+    accuracy = accuracy or ACCURACY
+    if accuracy == 'precise':
+        from src.lib import meeus  # pylint: disable=import-outside-toplevel
+        return meeus.phase(pdate)[0]
+    sun = sun_position(pdate)
+    return fixangle(moon_position(sun)[2] - sun[3]) / 360.0
+
+
+metrics.register_cache('truephase', _truephase.cache_info)
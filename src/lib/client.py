@@ -0,0 +1,129 @@
+""" Client side of `pyphoon --daemon`.
+
+    This module is imported on every `pyphoon` invocation, before anything
+    else, so it must stay cheap: no argparse, no dateutil, no moon tables.
+
+    Wire format (one request per connection):
+
+      request:  NUL separated fields: number of environment entries,
+                the "KEY=VALUE" environment entries, then argv
+      response: b"<status> <stdout length>\\n" + stdout + stderr
+"""
+
+import os
+import sys
+import _socket  # the socket wrapper module alone costs more than a render
+
+SOCKET_ENV = 'PYPHOON_SOCKET'
+NODAEMON_ENV = 'PYPHOON_NO_DAEMON'
+
+# Environment that changes what pyphoon prints (language, local time)
+FORWARDED_ENV = ('LANG', 'LANGUAGE', 'LC_ALL', 'LC_CTYPE', 'LC_MESSAGES', 'TZ', 'COLUMNS')
+
+# Options that must run in the calling process
+LOCAL_OPTIONS = ('--daemon', '--record', '--publish')
+
+TIMEOUT = 5.0
+ENCODING = 'utf-8'
+ERRORS = 'surrogateescape'
+
+
+def socket_path():
+    """ Path of the daemon socket: $PYPHOON_SOCKET, else pyphoon.sock in
+        $XDG_RUNTIME_DIR, else a per-user socket in /tmp (which anyone
+        could have created first: see forward()).
+    """
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'pyphoon.sock')
+    return f'/tmp/pyphoon-{os.getuid()}.sock'
+
+
+def should_forward(argv):
+    """ Tell if this command line may be served by the daemon
+    """
+    if os.environ.get(NODAEMON_ENV):
+        return False
+    for arg in argv:
+        if arg == '--':
+            break
+        if arg.split('=', 1)[0] in LOCAL_OPTIONS:
+            return False
+    return True
+
+
+def encode_request(argv, environ):
+    """ Serialize argv and the forwarded part of environ
+    """
+    env = [f'{key}={environ[key]}' for key in FORWARDED_ENV if key in environ]
+    fields = [str(len(env))] + env + list(argv)
+    return '\0'.join(fields).encode(ENCODING, ERRORS)
+
+
+def decode_request(data):
+    """ Inverse of encode_request(): return (argv, environ)
+    """
+    fields = data.decode(ENCODING, ERRORS).split('\0')
+    count = int(fields[0])
+    environ = dict(item.split('=', 1) for item in fields[1:1 + count])
+    return fields[1 + count:], environ
+
+
+def encode_response(status, out, err):
+    """ Serialize the exit status and the captured output streams
+    """
+    out = out.encode(ENCODING, ERRORS)
+    err = err.encode(ENCODING, ERRORS)
+    return b'%d %d\n' % (status, len(out)) + out + err
+
+
+def decode_response(data):
+    """ Inverse of encode_response(): return (status, out, err) as bytes
+    """
+    head, _, body = data.partition(b'\n')
+    status, outlen = head.split()
+    outlen = int(outlen)
+    return int(status), body[:outlen], body[outlen:]
+
+
+def forward(argv):
+    """ Run argv in the daemon and copy its output to our stdout/stderr.
+
+        Return the exit status, or None if no daemon could serve the
+        request (the caller then renders in-process).
+    """
+    path = socket_path()
+    try:
+        # Only talk to a daemon of ours: it gets our argv and environment,
+        # and what it answers is printed as ours
+        if os.stat(path).st_uid != os.getuid():
+            return None
+    except OSError:
+        return None
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.settimeout(TIMEOUT)
+        sock.connect(path)
+        sock.sendall(encode_request(argv, os.environ))
+        sock.shutdown(_socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        status, out, err = decode_response(b''.join(chunks))
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+    sys.stdout.buffer.write(out)
+    sys.stdout.flush()
+    if err:
+        sys.stderr.buffer.write(err)
+        sys.stderr.flush()
+    return status
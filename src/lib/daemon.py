@@ -0,0 +1,144 @@
+""" Resident pyphoon server (`pyphoon --daemon`).
+
+    Keeps one warm interpreter with the renderer, the moon tables, the
+    translations and the astro caches loaded, and answers the requests
+    sent by src.lib.client over a Unix domain socket.  Requests are
+    served one at a time: each of them only takes a fraction of a
+    millisecond, and it lets us swap os.environ and sys.stdout freely.
+"""
+
+import io
+import os
+import sys
+import time
+import signal
+import socket
+import socketserver
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+
+from src.lib import client
+from src import pyphoon
+from src.lib.moons import BACKGROUNDS
+
+# Seconds a client may take to send its request: requests are served one
+# at a time, so a stalled client would hold up all the others
+READTIMEOUT = 1.0
+
+
+@contextmanager
+def _environ(environ):
+    """ Apply the client's locale/time zone environment for one request
+    """
+    saved = {key: os.environ.get(key) for key in client.FORWARDED_ENV}
+    for key in client.FORWARDED_ENV:
+        if key in environ:
+            os.environ[key] = environ[key]
+        else:
+            os.environ.pop(key, None)
+    time.tzset()
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        time.tzset()
+
+
+def run(argv, environ):
+    """ Run pyphoon's main() for argv as if invoked with environ.
+        Return (status, stdout, stderr).
+    """
+    out = io.StringIO()
+    err = io.StringIO()
+    status = 0
+    with _environ(environ), redirect_stdout(out), redirect_stderr(err):
+        try:
+            pyphoon.main(argv)
+        except SystemExit as exc:
+            if exc.code is None:
+                status = 0
+            elif isinstance(exc.code, int):
+                status = exc.code
+            else:
+                print(exc.code, file=sys.stderr)
+                status = 1
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"pyphoon daemon: {exc!r}", file=sys.stderr)
+            status = 1
+    return status, out.getvalue(), err.getvalue()
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    """ Serve one forwarded invocation
+    """
+    def handle(self):
+        self.request.settimeout(READTIMEOUT)
+        chunks = []
+        try:
+            while True:
+                chunk = self.request.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        except OSError:
+            return  # timed out or gone: drop the request
+        if not chunks:
+            return  # liveness probe
+        argv, environ = client.decode_request(b''.join(chunks))
+        try:
+            self.request.sendall(client.encode_response(*run(argv, environ)))
+        except OSError:
+            pass  # the client gave up waiting
+
+
+def _is_alive(path):
+    """ Tell if some process is accepting connections on path
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def warm_up():
+    """ Load everything a request may need (tables, translations,
+        dateutil, astro caches) before the first client arrives.
+    """
+    with redirect_stdout(io.StringIO()):
+        pyphoon.main(['--notext'])
+        for numlines in BACKGROUNDS:
+            pyphoon.putmoon(time.time(), numlines, '@', False, 'en', 'north', 'None')
+
+
+def serve(path=None):
+    """ Listen on path (client.socket_path() by default) until interrupted
+    """
+    path = path or client.socket_path()
+    if os.path.exists(path):
+        if _is_alive(path):
+            pyphoon.fatal(f"pyphoon daemon already listening on {path}")
+        os.unlink(path)
+
+    warm_up()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    old_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(path, RequestHandler)
+    finally:
+        os.umask(old_umask)
+
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
@@ -0,0 +1,277 @@
+""" Date parsing for the command line tools.
+
+    The common formats (ISO-8601, "YYYY-MM-DD[ HH:MM[:SS]]", Unix time)
+    are parsed here by hand: importing dateutil, or even re, costs more
+    than rendering a moon.  dateutil is only imported for the free-form
+    input it alone understands.
+
+    Dates without a time zone are local time, like time.mktime() does;
+    dates with one ("Z", "+02:00", "-0530", ...) are converted exactly.
+
+    The batch converters use NumPy when it is installed; it is imported
+    on first use only.
+"""
+
+import time
+
+from src.lib.astro import unix_to_julian
+
+# Bare numbers with at least that many digits are Unix times, not years
+# nor compact YYYYMMDD dates.  "@<number>" is always a Unix time.
+EPOCHDIGITS = 9
+
+DAYSINMONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+SECSPERMINUTE = 60
+SECSPERHOUR = (60 * SECSPERMINUTE)
+SECSPERDAY = (24 * SECSPERHOUR)
+
+
+def putseconds(secs):
+    """ Create a datestring for format 'dd HH:MM:SS'
+    """
+    days = int(secs / SECSPERDAY)
+    secs = int(secs - days * SECSPERDAY)
+    hours = int(secs / SECSPERHOUR)
+    secs = int(secs - hours * SECSPERHOUR)
+    minutes = int(secs / SECSPERMINUTE)
+    secs = int(secs - minutes * SECSPERMINUTE)
+
+    return f"{days:d} {hours:2d}:{minutes:02d}:{secs:02d}"
+
+
+def days_from_civil(year, month, day):
+    """ Days since 1970-01-01 of a proleptic Gregorian date.
+        Works on ints and on NumPy integer arrays alike.
+    """
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _is_leap(year):
+    """ Tell if year is a Gregorian leap year
+    """
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _digits(text):
+    """ Tell if text is made of ASCII digits only
+    """
+    return text.isascii() and text.isdigit()
+
+
+def _parse_offset(text):
+    """ Seconds east of UTC for "Z", "+HH", "+HHMM" or "+HH:MM"
+    """
+    if text in ('Z', 'z'):
+        return 0
+    sign = 1 if text[0] == '+' else -1
+    text = text[1:].replace(':', '')
+    if len(text) not in (2, 4) or not _digits(text):
+        return None
+    hours, minutes = int(text[:2]), int(text[2:] or 0)
+    if hours > 23 or minutes > 59:
+        return None
+    return sign * (hours * 3600 + minutes * 60)
+
+
+def parse_iso(text):
+    """ Parse "YYYY-MM-DD[(T| )HH:MM[:SS[.ffffff]]][Z|±HH[:MM]]".
+
+        Return the Unix time, or None if text is not in that format.
+    """
+    offset = None
+    if text[-1:] in ('Z', 'z'):
+        offset, text = 0, text[:-1]
+    else:
+        sign = max(text.rfind('+'), text.rfind('-'))
+        if sign > 10:
+            offset = _parse_offset(text[sign:])
+            if offset is None:
+                return None
+            text = text[:sign]
+
+    date, clock = text[:10], text[11:]
+    if (len(date) != 10 or date[4] != '-' or date[7] != '-'
+            or not _digits(date[:4] + date[5:7] + date[8:])
+            or text[10:11] not in ('', 'T', 't', ' ')
+            or (len(text) > 10 and not clock)):
+        return None
+    year, month, day = int(date[:4]), int(date[5:7]), int(date[8:])
+
+    hour = minute = second = 0
+    fraction = 0.0
+    if clock:
+        if '.' in clock:
+            clock, frac = clock.split('.', 1)
+            if not _digits(frac):
+                return None
+            fraction = float('0.' + frac)
+        parts = clock.split(':')
+        if len(parts) not in (2, 3) or not all(len(p) == 2 and _digits(p) for p in parts):
+            return None
+        hour, minute = int(parts[0]), int(parts[1])
+        second = int(parts[2]) if len(parts) == 3 else 0
+        if fraction and len(parts) != 3:
+            return None
+
+    if not 1 <= month <= 12 or hour > 23 or minute > 59 or second > 59:
+        return None
+    if not 1 <= day <= DAYSINMONTH[month - 1] + (month == 2 and _is_leap(year)):
+        return None
+
+    if offset is None:
+        return time.mktime((year, month, day, hour, minute, second, 0, 0, -1)) + fraction
+    return (days_from_civil(year, month, day) * 86400
+            + hour * 3600 + minute * 60 + second - offset + fraction)
+
+
+def parse_epoch(text):
+    """ Parse "@1700000000" or a bare Unix time, None if text is not one
+    """
+    bare = not text.startswith('@')
+    number = text if bare else text[1:]
+    digits = number.lstrip('+-').split('.', 1)
+    if not all(_digits(part) for part in digits if part) or not digits[0]:
+        return None
+    if bare and len(digits[0]) < EPOCHDIGITS:
+        return None
+    return float(number)
+
+
+def parse_timestamp(text):
+    """ Convert a date string to Unix time.
+
+        Raise ValueError if it can't be parsed.
+    """
+    text = text.strip()
+    if not text:
+        raise ValueError("empty date")
+
+    stamp = parse_epoch(text)
+    if stamp is None:
+        stamp = parse_iso(text)
+    if stamp is not None:
+        return stamp
+
+    import dateutil.parser  # pylint: disable=import-outside-toplevel
+    try:
+        dateobj = dateutil.parser.parse(text)
+    except OverflowError as err:
+        raise ValueError(str(err)) from err
+    if dateobj.utcoffset() is not None:
+        return dateobj.timestamp()
+    return time.mktime(dateobj.timetuple()) + dateobj.microsecond / 1e6
+
+
+def _local_offsets(hours):
+    """ UTC offset (seconds) of the local time zone at each of the given
+        local-time hours (counted since 1970-01-01T00 local)
+    """
+    offsets = {}
+    for hour in hours:
+        fields = time.gmtime(hour * 3600)
+        offsets[hour] = hour * 3600 - time.mktime(fields[:8] + (-1,))
+    return offsets
+
+
+def _numpy():
+    """ The numpy module, or None if it is not installed
+    """
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return numpy
+
+
+def _vector_timestamps(strings):
+    """ Unix times of the fixed-width ISO strings among strings, computed
+        on whole columns at once.  Return (stamps, parsed mask).
+    """
+    np = _numpy()
+    text = np.array(strings, dtype=str)
+    width = max(text.dtype.itemsize // 4, 20)
+    codes = np.zeros((len(text), width), dtype=np.uint32)
+    raw = text.view(np.uint32).reshape(len(text), -1)
+    codes[:, :raw.shape[1]] = raw
+    length = np.count_nonzero(codes, axis=1)
+
+    utc = (length > 10) & (codes[np.arange(len(text)), np.maximum(length - 1, 0)] == ord('Z'))
+    clock = np.where(utc, length - 1, length)
+
+    def number(start, end):
+        digits = codes[:, start:end].astype(np.int64) - ord('0')
+        valid = np.all((digits >= 0) & (digits <= 9), axis=1)
+        value = np.zeros(len(text), dtype=np.int64)
+        for col in range(end - start):
+            value = value * 10 + digits[:, col]
+        return value, valid
+
+    year, ok_year = number(0, 4)
+    month, ok_month = number(5, 7)
+    day, ok_day = number(8, 10)
+    hour, ok_hour = number(11, 13)
+    minute, ok_minute = number(14, 16)
+    second, ok_second = number(17, 19)
+
+    has_time = clock >= 16
+    has_seconds = clock == 19
+    hour = np.where(has_time, hour, 0)
+    minute = np.where(has_time, minute, 0)
+    second = np.where(has_seconds, second, 0)
+
+    monthdays = np.array(DAYSINMONTH)[np.clip(month - 1, 0, 11)]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    monthdays = monthdays + ((month == 2) & leap)
+
+    valid = (
+        np.isin(clock, (10, 16, 19)) & ok_year & ok_month & ok_day
+        & (codes[:, 4] == ord('-')) & (codes[:, 7] == ord('-'))
+        & ((clock == 10) | (((codes[:, 10] == ord('T')) | (codes[:, 10] == ord(' ')))
+                            & (codes[:, 13] == ord(':')) & ok_hour & ok_minute))
+        & (~has_seconds | ((codes[:, 16] == ord(':')) & ok_second))
+        & (month >= 1) & (month <= 12) & (day >= 1) & (day <= monthdays)
+        & (hour <= 23) & (minute <= 59) & (second <= 59)
+    )
+    valid &= (clock > 10) | ~utc
+
+    stamps = (days_from_civil(year, month, day) * 86400
+              + hour * 3600 + minute * 60 + second).astype(np.float64)
+
+    local = valid & ~utc
+    if local.any():
+        hours = stamps[local] // 3600
+        offsets = _local_offsets(np.unique(hours).astype(np.int64).tolist())
+        stamps[local] -= np.array([offsets[hour] for hour in hours.astype(np.int64).tolist()])
+    return stamps, valid
+
+
+def timestamps(strings):
+    """ Convert a column of date strings to Unix times, as a NumPy array
+        if NumPy is available, a list otherwise.
+    """
+    np = _numpy()
+    if np is None:
+        return [parse_timestamp(text) for text in strings]
+
+    strings = [text.strip() for text in strings]
+    if not strings:
+        return np.zeros(0)
+    stamps, valid = _vector_timestamps(strings)
+    for idx in np.flatnonzero(~valid).tolist():
+        stamps[idx] = parse_timestamp(strings[idx])
+    return stamps
+
+
+def julian_dates(strings):
+    """ Convert a column of date strings to Julian dates, see timestamps()
+    """
+    stamps = timestamps(strings)
+    if isinstance(stamps, list):
+        return [unix_to_julian(stamp) for stamp in stamps]
+    return unix_to_julian(stamps)
@@ -0,0 +1,136 @@
+""" Eclipse candidates: the new and full moons close enough to a node of
+    the Moon's orbit for an eclipse.
+
+    An eclipse needs the Sun, the Earth and the Moon nearly aligned, i.e.
+    a syzygy (new moon: solar eclipse, full moon: lunar eclipse) while the
+    Moon is near the ecliptic, that is near one of the nodes of its
+    orbit.  How near is given by the ecliptic limits: beyond the major
+    limit there can be no eclipse, within the minor one there is one
+    whatever the distances of the Sun and the Moon.  In between, it
+    depends on them, and the candidate is only possible.
+
+    The syzygies are the truephase() of every lunation and the node
+    distance comes from the positions of phase() (node_distance()): with
+    NumPy and the default accuracy, both are computed for all the
+    lunations of the range at once (src.lib.vastro), which scans
+    centuries in milliseconds.
+"""
+
+import time
+from math import floor, ceil
+
+from src.lib import astro
+from src.lib.astro import (SYNMONTH, truephase, sun_position, moon_position,
+                           node_position, node_distance, julian_to_unix)
+
+# Ecliptic limits, degrees from the node: (minor, major)
+LIMITS = {
+    'solar': (15.4, 18.5),
+    'lunar': (9.5, 12.2),       # partial or total, in the umbra
+    'penumbral': (15.7, 18.8),  # in the penumbra only
+}
+MAXLIMIT = max(major for _, major in LIMITS.values())
+
+NEWMOONBASE = 2415020.75933  # Mean new moon of lunation 0 of truephase()
+
+
+class Eclipse:
+    """ A new or full moon near a node: kind is 'solar', 'lunar' (the
+        Moon may enter the umbra) or 'penumbral' (the penumbra only),
+        node_distance the Moon's distance from the node in degrees,
+        positive past it, and certain tells if it is within the minor
+        ecliptic limit
+    """
+    __slots__ = ('juliandate', 'kind', 'node_distance', 'certain')
+
+    def __init__(self, juliandate, kind, distance):
+        self.juliandate = juliandate
+        self.kind = kind
+        self.node_distance = distance
+        self.certain = abs(distance) < LIMITS[kind][0]
+
+    @property
+    def timestamp(self):
+        """ Unix time of the new or full moon
+        """
+        return julian_to_unix(self.juliandate)
+
+    def __repr__(self):
+        return (f'Eclipse({self.juliandate!r}, {self.kind!r}, {self.node_distance:.2f}, '
+                f'certain={self.certain})')
+
+
+def classify(syzygy, distance):
+    """ Kind of eclipse possible at a new (syzygy 0.0) or full (0.5) moon
+        distance degrees from the node, or None
+    """
+    distance = abs(distance)
+    if syzygy < 0.25:
+        return 'solar' if distance < LIMITS['solar'][1] else None
+    if distance < LIMITS['lunar'][1]:
+        return 'lunar'
+    return 'penumbral' if distance < LIMITS['penumbral'][1] else None
+
+
+def _vectorized(accuracy):
+    """ The vastro module if it can stand in for astro at this accuracy
+    """
+    if (accuracy or astro.ACCURACY) != 'default':
+        return None
+    from src.lib import vastro  # pylint: disable=import-outside-toplevel
+    return vastro if vastro.HAVE_NUMPY else None
+
+
+def _syzygies(lunations, start, end, accuracy):
+    """ (juliandate, syzygy, node distance) of the new (syzygy 0.0) and
+        full (0.5) moons of lunations from start to end which are within
+        MAXLIMIT of a node, in increasing order
+    """
+    vastro = _vectorized(accuracy)
+    if vastro is not None:
+        np = vastro.np
+        times = np.column_stack([vastro.truephase(np.array(lunations), syzygy)
+                                 for syzygy in (0.0, 0.5)]).ravel()
+        syzygies = np.tile([0.0, 0.5], len(lunations))
+        sun = vastro.sun_position(times)
+        distances = node_distance(vastro.moon_position(sun)[2], vastro.node_position(sun))
+        near = (times >= start) & (times < end) & (np.abs(distances) < MAXLIMIT)
+        return zip(times[near].tolist(), syzygies[near].tolist(), distances[near].tolist())
+    return _scalar_syzygies(lunations, start, end, accuracy)
+
+
+def _scalar_syzygies(lunations, start, end, accuracy):
+    """ _syzygies() a syzygy at a time
+    """
+    for k in lunations:
+        for syzygy in (0.0, 0.5):
+            juliandate = truephase(k, syzygy, accuracy)
+            if start <= juliandate < end:
+                sun = sun_position(juliandate)
+                distance = node_distance(moon_position(sun)[2], node_position(sun))
+                if abs(distance) < MAXLIMIT:
+                    yield juliandate, syzygy, distance
+
+
+def eclipses(start, end, accuracy=None):
+    """ Eclipse candidates between the Julian dates start and end
+        (excluded), in increasing order, as a list of Eclipse
+    """
+    # The true phases stray from the mean ones by less than a day
+    lunations = range(floor((start - NEWMOONBASE) / SYNMONTH) - 1,
+                      ceil((end - NEWMOONBASE) / SYNMONTH) + 1)
+    found = []
+    for juliandate, syzygy, distance in _syzygies(lunations, start, end, accuracy):
+        kind = classify(syzygy, distance)
+        if kind is not None:
+            found.append(Eclipse(juliandate, kind, distance))
+    return found
+
+
+def describe(found):
+    """ One line for an Eclipse: local date and time of the new or full
+        moon, kind, distance from the node and certainty
+    """
+    when = time.strftime('%Y-%m-%d %H:%M %Z', time.localtime(found.timestamp))
+    certainty = 'certain' if found.certain else 'possible'
+    return f"{when}  {found.kind:9}  {found.node_distance:+5.1f}\u00b0 from the node  {certainty}"
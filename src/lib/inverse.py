@@ -0,0 +1,232 @@
+""" Inverse queries: when does the Moon reach a given phase, age or
+    illuminated fraction?
+
+    The terminator phase grows monotonically through each synodic month,
+    so a given phase is reached once per lunation, within a day of the
+    instant predicted by the mean lunation (MEANNEWMOON + k * SYNMONTH).
+    The roots are bracketed a chunk of lunations at a time (with NumPy,
+    the brackets of a whole chunk are checked with one vastro.phase()
+    call) and refined with Brent's method on the phase() outputs.
+
+    The illuminated fraction grows from new moon to full moon and drops
+    back until the next new moon: its roots are searched for on these
+    monotonic segments, whose ends are found the same way.
+
+    Every query is a generator of Julian dates, in increasing order, over
+    [start, end) or from start on without an end.
+"""
+
+import sys
+from math import floor
+
+from src.lib import astro
+from src.lib.astro import SYNMONTH, phase, terminator_phase
+
+MEANNEWMOON = 2451550.09766  # Mean new moon of 2000 January 6 (Meeus, ch. 49)
+
+# Half-width of the brackets around the mean instants, days.  The true
+# phases stray from the mean ones by less than a day, and the terminator
+# phase has no discontinuity closer than half a synodic month to a root.
+MARGIN = SYNMONTH / 4
+
+CHUNK = 32            # lunations bracketed at a time
+XTOL = 1e-8           # days, about a millisecond
+MAXITER = 100
+EPS = sys.float_info.epsilon
+
+
+def brent(func, lower, upper, flower=None, fupper=None, xtol=XTOL, maxiter=MAXITER):  # pylint: disable=too-many-arguments,too-many-branches
+    """ Root of func in [lower, upper] by Brent's method: inverse quadratic
+        interpolation, falling back to bisection when it doesn't converge.
+        func(lower) and func(upper) (or flower and fupper, if already
+        known) must have opposite signs.
+    """
+    # pylint: disable=invalid-name
+    a, b = lower, upper
+    fa = func(a) if flower is None else flower
+    fb = func(b) if fupper is None else fupper
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+    if (fa > 0) == (fb > 0):
+        raise ValueError("root not bracketed")
+
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(maxiter):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tol = 2 * EPS * abs(b) + 0.5 * xtol
+        middle = 0.5 * (c - b)
+        if abs(middle) <= tol or fb == 0:
+            return b
+
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                # Secant
+                p = 2 * middle * s
+                q = 1 - s
+            else:
+                # Inverse quadratic interpolation
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * middle * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            else:
+                p = -p
+            if 2 * p < min(3 * middle * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = middle
+        else:
+            d = e = middle
+
+        a, fa = b, fb
+        b += d if abs(d) > tol else (tol if middle > 0 else -tol)
+        fb = func(b)
+    return b
+
+
+def _wrap(diff):
+    """ diff, a fraction of a cycle, brought into [-0.5, 0.5)
+    """
+    return diff - floor(diff + 0.5)
+
+
+def _phase_error(target, accuracy):
+    """ Function of a Julian date, zero when the terminator phase is target
+    """
+    def error(juliandate):
+        return _wrap(terminator_phase(juliandate, accuracy) - target)
+    return error
+
+
+def _vectorized(accuracy):
+    """ The vastro module if it can stand in for astro at this accuracy
+    """
+    if (accuracy or astro.ACCURACY) != 'default':
+        return None
+    from src.lib import vastro  # pylint: disable=import-outside-toplevel
+    return vastro if vastro.HAVE_NUMPY else None
+
+
+def _phases(juliandates, accuracy):
+    """ Terminator phase and illuminated fraction at each of juliandates
+    """
+    vastro = _vectorized(accuracy)
+    if vastro is not None:
+        result = vastro.phase(vastro.np.array(juliandates))
+        return result[0].tolist(), result[1].tolist()
+    results = [phase(juliandate, accuracy) for juliandate in juliandates]
+    return [res.phase for res in results], [res.illuminated for res in results]
+
+
+def _lunations(start):
+    """ Numbers k of the mean lunations, from one starting before start
+    """
+    k = floor((start - MEANNEWMOON) / SYNMONTH) - 1
+    while True:
+        yield range(k, k + CHUNK)
+        k += CHUNK
+
+
+def _phase_roots(targets, start, end, accuracy, xtol):
+    """ Instants of the terminator phases in targets (fractions of a
+        cycle), in increasing order, as (juliandate, target) pairs
+    """
+    targets = sorted(targets)
+    errors = {target: _phase_error(target, accuracy) for target in targets}
+    for lunations in _lunations(start):
+        centres = [(MEANNEWMOON + (k + target) * SYNMONTH, target)
+                   for k in lunations for target in targets]
+        if end is not None and centres[0][0] - MARGIN >= end:
+            return
+
+        bounds = [centre - MARGIN for centre, _ in centres] + [centre + MARGIN for centre, _ in centres]
+        values = _phases(bounds, accuracy)[0]
+        for idx, (centre, target) in enumerate(centres):
+            lower = _wrap(values[idx] - target)
+            upper = _wrap(values[idx + len(centres)] - target)
+            root = brent(errors[target], centre - MARGIN, centre + MARGIN, lower, upper, xtol)
+            if end is not None and root >= end:
+                return
+            if root >= start:
+                yield root, target
+
+
+def phase_times(target, start, end=None, accuracy=None, xtol=XTOL):  # pylint: disable=too-many-arguments
+    """ Julian dates when the terminator phase (phase()[0], a fraction of
+        a full circle: 0 new, 0.25 first quarter, 0.5 full moon...) equals
+        target, from start to end (excluded, None for no end)
+    """
+    for root, _ in _phase_roots([target % 1.0], start, end, accuracy, xtol):
+        yield root
+
+
+def age_times(target, start, end=None, accuracy=None, xtol=XTOL):  # pylint: disable=too-many-arguments
+    """ Julian dates when the age of the Moon (phase()[2]) is target days,
+        from start to end (excluded, None for no end)
+    """
+    if not 0 <= target < SYNMONTH:
+        raise ValueError(f"age must be between 0 and {SYNMONTH} days")
+    return phase_times(target / SYNMONTH, start, end, accuracy, xtol)
+
+
+def illumination_times(target, start, end=None, accuracy=None, xtol=XTOL):  # pylint: disable=too-many-arguments
+    """ Julian dates when the illuminated fraction of the Moon's disc
+        (phase()[1]) is target, waxing and waning, from start to end
+        (excluded, None for no end).  target must be strictly between
+        0 and 1: look for new and full moons with phase_times().
+    """
+    if not 0 < target < 1:
+        raise ValueError("illuminated fraction must be strictly between 0 and 1")
+    return _illumination_times(target, start, end, accuracy, xtol)
+
+
+def _illumination_times(target, start, end, accuracy, xtol):
+    """ illumination_times() once its arguments are checked
+    """
+    def error(juliandate):
+        return phase(juliandate, accuracy).illuminated - target
+
+    # The illuminated fraction is monotonic between new and full moons.
+    # These segments last up to about 15.6 days, more than half a synodic
+    # month: start a whole month back to get the boundary before start.
+    pending = []
+    previous = None
+    for boundary, _ in _phase_roots([0.0, 0.5], start - SYNMONTH, end, accuracy, xtol):
+        if previous is not None:
+            pending.append((previous, boundary))
+        previous = boundary
+        if len(pending) < 2 * CHUNK:
+            continue
+        yield from _segment_roots(error, pending, target, start, end, accuracy, xtol)
+        pending = []
+    if previous is not None and end is not None and previous < end:
+        pending.append((previous, end))
+    yield from _segment_roots(error, pending, target, start, end, accuracy, xtol)
+
+
+def _segment_roots(error, segments, target, start, end, accuracy, xtol):  # pylint: disable=too-many-arguments
+    """ Roots of error on each of the monotonic segments, in [start, end)
+    """
+    if not segments:
+        return
+    bounds = [lower for lower, _ in segments] + [segments[-1][1]]
+    values = [value - target for value in _phases(bounds, accuracy)[1]]
+    for idx, (lower, upper) in enumerate(segments):
+        flower, fupper = values[idx], values[idx + 1]
+        if (flower > 0) == (fupper > 0):
+            continue
+        root = brent(error, lower, upper, flower, fupper, xtol)
+        if start <= root and (end is None or root < end):
+            yield root
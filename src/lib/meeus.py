@@ -0,0 +1,320 @@
+""" Full series from Jean Meeus, "Astronomical Algorithms", 2nd Edition,
+    Willmann-Bell, 1998.
+
+    Chapter 49: instants of the phases of the Moon, with all the periodic
+    and planetary terms.  Chapter 47: geocentric longitude, latitude and
+    distance of the Moon (the 60 main terms of ELP-2000/82 in each of
+    tables 47.A and 47.B).  Chapter 25: low accuracy position of the Sun.
+
+    These are the `precise` accuracy tier of src.lib.astro: about a minute
+    on the phase instants and a few arc seconds on the Moon's longitude,
+    where the moontool algorithms are off by up to a quarter of an hour.
+    Meeus' results are in Dynamical Time; delta_t() converts to UT.
+"""
+
+from math import sin, cos, asin, atan2, sqrt, radians, degrees
+
+from src.lib.astro import fixangle, SYNMONTH
+
+AU = 149597870.7        # Astronomical unit, km
+MOONRADIUS = 1737.4     # km
+SUNRADIUS = 695700.0    # km
+
+# Synodic month index of Meeus' k = 0 (2000 January 6) in moontool's
+# numbering, which starts in 1900 January
+KOFFSET = 1237
+
+
+def delta_t(year):
+    """ TT - UT in seconds for a (fractional) year, from the polynomial
+        expressions of Espenak and Meeus (NASA eclipse web site, 2006)
+    """
+    # pylint: disable=too-many-return-statements
+    if 2005 <= year < 2050:
+        yrs = year - 2000
+        return 62.92 + 0.32217 * yrs + 0.005589 * yrs ** 2
+    if 1986 <= year < 2005:
+        yrs = year - 2000
+        return (63.86 + 0.3345 * yrs - 0.060374 * yrs ** 2 + 0.0017275 * yrs ** 3
+                + 0.000651814 * yrs ** 4 + 0.00002373599 * yrs ** 5)
+    if 1961 <= year < 1986:
+        yrs = year - 1975
+        return 45.45 + 1.067 * yrs - yrs ** 2 / 260 - yrs ** 3 / 718
+    if 1941 <= year < 1961:
+        yrs = year - 1950
+        return 29.07 + 0.407 * yrs - yrs ** 2 / 233 + yrs ** 3 / 2547
+    if 1920 <= year < 1941:
+        yrs = year - 1920
+        return 21.20 + 0.84493 * yrs - 0.076100 * yrs ** 2 + 0.0020936 * yrs ** 3
+    if 1900 <= year < 1920:
+        yrs = year - 1900
+        return (-2.79 + 1.494119 * yrs - 0.0598939 * yrs ** 2 + 0.0061966 * yrs ** 3
+                - 0.000197 * yrs ** 4)
+    if 1860 <= year < 1900:
+        yrs = year - 1860
+        return (7.62 + 0.5737 * yrs - 0.251754 * yrs ** 2 + 0.01680668 * yrs ** 3
+                - 0.0004473624 * yrs ** 4 + yrs ** 5 / 233174)
+    centuries = (year - 1820) / 100
+    if 2050 <= year < 2150:
+        return -20 + 32 * centuries ** 2 - 0.5628 * (2150 - year)
+    return -20 + 32 * centuries ** 2
+
+
+def delta_t_days(juliandate):
+    """ TT - UT in days around juliandate
+    """
+    return delta_t(2000.0 + (juliandate - 2451544.5) / 365.25) / 86400.0
+
+
+#  Chapter 49: phases of the Moon
+
+#  (coefficient, power of E, multiples of M, M', F, Omega)
+NEWMOONTERMS = (
+    (-0.40720, 0, 0, 1, 0, 0), (0.17241, 1, 1, 0, 0, 0), (0.01608, 0, 0, 2, 0, 0),
+    (0.01039, 0, 0, 0, 2, 0), (0.00739, 1, -1, 1, 0, 0), (-0.00514, 1, 1, 1, 0, 0),
+    (0.00208, 2, 2, 0, 0, 0), (-0.00111, 0, 0, 1, -2, 0), (-0.00057, 0, 0, 1, 2, 0),
+    (0.00056, 1, 1, 2, 0, 0), (-0.00042, 0, 0, 3, 0, 0), (0.00042, 1, 1, 0, 2, 0),
+    (0.00038, 1, 1, 0, -2, 0), (-0.00024, 1, -1, 2, 0, 0), (-0.00017, 0, 0, 0, 0, 1),
+    (-0.00007, 0, 2, 1, 0, 0), (0.00004, 0, 0, 2, -2, 0), (0.00004, 0, 3, 0, 0, 0),
+    (0.00003, 0, 1, 1, -2, 0), (0.00003, 0, 0, 2, 2, 0), (-0.00003, 0, 1, 1, 2, 0),
+    (0.00003, 0, -1, 1, 2, 0), (-0.00002, 0, -1, 1, -2, 0), (-0.00002, 0, 1, 3, 0, 0),
+    (0.00002, 0, 0, 4, 0, 0),
+)
+
+FULLMOONTERMS = (
+    (-0.40614, 0, 0, 1, 0, 0), (0.17302, 1, 1, 0, 0, 0), (0.01614, 0, 0, 2, 0, 0),
+    (0.01043, 0, 0, 0, 2, 0), (0.00734, 1, -1, 1, 0, 0), (-0.00515, 1, 1, 1, 0, 0),
+    (0.00209, 2, 2, 0, 0, 0), (-0.00111, 0, 0, 1, -2, 0), (-0.00057, 0, 0, 1, 2, 0),
+    (0.00056, 1, 1, 2, 0, 0), (-0.00042, 0, 0, 3, 0, 0), (0.00042, 1, 1, 0, 2, 0),
+    (0.00038, 1, 1, 0, -2, 0), (-0.00024, 1, -1, 2, 0, 0), (-0.00017, 0, 0, 0, 0, 1),
+    (-0.00007, 0, 2, 1, 0, 0), (0.00004, 0, 0, 2, -2, 0), (0.00004, 0, 3, 0, 0, 0),
+    (0.00003, 0, 1, 1, -2, 0), (0.00003, 0, 0, 2, 2, 0), (-0.00003, 0, 1, 1, 2, 0),
+    (0.00003, 0, -1, 1, 2, 0), (-0.00002, 0, -1, 1, -2, 0), (-0.00002, 0, 1, 3, 0, 0),
+    (0.00002, 0, 0, 4, 0, 0),
+)
+
+QUARTERTERMS = (
+    (-0.62801, 0, 0, 1, 0, 0), (0.17172, 1, 1, 0, 0, 0), (-0.01183, 1, 1, 1, 0, 0),
+    (0.00862, 0, 0, 2, 0, 0), (0.00804, 0, 0, 0, 2, 0), (0.00454, 1, -1, 1, 0, 0),
+    (0.00204, 2, 2, 0, 0, 0), (-0.00180, 0, 0, 1, -2, 0), (-0.00070, 0, 0, 1, 2, 0),
+    (-0.00040, 0, 0, 3, 0, 0), (-0.00034, 1, -1, 2, 0, 0), (0.00032, 1, 1, 0, 2, 0),
+    (0.00032, 1, 1, 0, -2, 0), (-0.00028, 2, 2, 1, 0, 0), (0.00027, 1, 1, 2, 0, 0),
+    (-0.00017, 0, 0, 0, 0, 1), (-0.00005, 0, -1, 1, -2, 0), (0.00004, 0, 0, 2, 2, 0),
+    (-0.00004, 0, 1, 1, 2, 0), (0.00004, 0, -2, 1, 0, 0), (0.00003, 0, 1, 1, -2, 0),
+    (0.00003, 0, 3, 0, 0, 0), (0.00002, 0, 0, 2, -2, 0), (0.00002, 0, -1, 1, 2, 0),
+    (-0.00002, 0, 1, 3, 0, 0),
+)
+
+#  Planetary arguments A2 to A14: (constant, coefficient of k, amplitude
+#  in days).  A1 also has a T**2 term and is handled apart.
+PLANETARYTERMS = (
+    (251.88, 0.016321, 0.000165),
+    (251.83, 26.651886, 0.000164), (349.42, 36.412478, 0.000126),
+    (84.66, 18.206239, 0.000110), (141.74, 53.303771, 0.000062),
+    (207.14, 2.453732, 0.000060), (154.84, 7.306860, 0.000056),
+    (34.52, 27.261239, 0.000047), (207.19, 0.121824, 0.000042),
+    (291.34, 1.844379, 0.000040), (161.72, 24.198154, 0.000037),
+    (239.56, 25.513099, 0.000035), (331.55, 3.592518, 0.000023),
+)
+
+
+def phase_jde(k):
+    """ Instant (JDE, Dynamical Time) of the lunar phase k: an integer k
+        is a new moon, k + 0.25 first quarter, k + 0.5 full moon and
+        k + 0.75 last quarter; k = 0 is the new moon of 2000 January 6.
+    """
+    # pylint: disable=too-many-locals
+    quarter = round((k % 1) * 4) % 4
+    jul_time = k / 1236.85
+    jul_time2 = jul_time * jul_time
+    jul_time3 = jul_time2 * jul_time
+    jul_time4 = jul_time3 * jul_time
+
+    jde = (2451550.09766 + 29.530588861 * k + 0.00015437 * jul_time2
+           - 0.000000150 * jul_time3 + 0.00000000073 * jul_time4)
+
+    ecc = 1 - 0.002516 * jul_time - 0.0000074 * jul_time2
+    sun_anom = radians(2.5534 + 29.10535670 * k - 0.0000014 * jul_time2
+                       - 0.00000011 * jul_time3)
+    moon_anom = radians(201.5643 + 385.81693528 * k + 0.0107582 * jul_time2
+                        + 0.00001238 * jul_time3 - 0.000000058 * jul_time4)
+    arg_lat = radians(160.7108 + 390.67050284 * k - 0.0016118 * jul_time2
+                      - 0.00000227 * jul_time3 + 0.000000011 * jul_time4)
+    node = radians(124.7746 - 1.56375588 * k + 0.0020672 * jul_time2
+                   + 0.00000215 * jul_time3)
+
+    terms = (NEWMOONTERMS, QUARTERTERMS, FULLMOONTERMS, QUARTERTERMS)[quarter]
+    for coeff, epow, msun, mmoon, mlat, mnode in terms:
+        jde += coeff * ecc ** epow * sin(
+            msun * sun_anom + mmoon * moon_anom + mlat * arg_lat + mnode * node)
+
+    if quarter in (1, 3):
+        wcorr = (0.00306 - 0.00038 * ecc * cos(sun_anom) + 0.00026 * cos(moon_anom)
+                 - 0.00002 * cos(moon_anom - sun_anom) + 0.00002 * cos(moon_anom + sun_anom)
+                 + 0.00002 * cos(2 * arg_lat))
+        jde += wcorr if quarter == 1 else -wcorr
+
+    jde += 0.000325 * sin(radians(299.77 + 0.107408 * k - 0.009173 * jul_time2))
+    for const, rate, amplitude in PLANETARYTERMS:
+        jde += amplitude * sin(radians(const + rate * k))
+
+    return jde
+
+
+def truephase(k, moonphase):
+    """ Same as astro.truephase() (moontool's k numbering, UT result),
+        from the full chapter 49 series
+    """
+    jde = phase_jde(k - KOFFSET + moonphase)
+    return jde - delta_t_days(jde)
+
+
+#  Chapter 47: position of the Moon
+
+#  (multiples of D, M, M', F, sum l coefficient, sum r coefficient)
+LONGDISTTERMS = (
+    (0, 0, 1, 0, 6288774, -20905355), (2, 0, -1, 0, 1274027, -3699111),
+    (2, 0, 0, 0, 658314, -2955968), (0, 0, 2, 0, 213618, -569925),
+    (0, 1, 0, 0, -185116, 48888), (0, 0, 0, 2, -114332, -3149),
+    (2, 0, -2, 0, 58793, 246158), (2, -1, -1, 0, 57066, -152138),
+    (2, 0, 1, 0, 53322, -170733), (2, -1, 0, 0, 45758, -204586),
+    (0, 1, -1, 0, -40923, -129620), (1, 0, 0, 0, -34720, 108743),
+    (0, 1, 1, 0, -30383, 104755), (2, 0, 0, -2, 15327, 10321),
+    (0, 0, 1, 2, -12528, 0), (0, 0, 1, -2, 10980, 79661),
+    (4, 0, -1, 0, 10675, -34782), (0, 0, 3, 0, 10034, -23210),
+    (4, 0, -2, 0, 8548, -21636), (2, 1, -1, 0, -7888, 24208),
+    (2, 1, 0, 0, -6766, 30824), (1, 0, -1, 0, -5163, -8379),
+    (1, 1, 0, 0, 4987, -16675), (2, -1, 1, 0, 4036, -12831),
+    (2, 0, 2, 0, 3994, -10445), (4, 0, 0, 0, 3861, -11650),
+    (2, 0, -3, 0, 3665, 14403), (0, 1, -2, 0, -2689, -7003),
+    (2, 0, -1, 2, -2602, 0), (2, -1, -2, 0, 2390, 10056),
+    (1, 0, 1, 0, -2348, 6322), (2, -2, 0, 0, 2236, -9884),
+    (0, 1, 2, 0, -2120, 5751), (0, 2, 0, 0, -2069, 0),
+    (2, -2, -1, 0, 2048, -4950), (2, 0, 1, -2, -1773, 4130),
+    (2, 0, 0, 2, -1595, 0), (4, -1, -1, 0, 1215, -3958),
+    (0, 0, 2, 2, -1110, 0), (3, 0, -1, 0, -892, 3258),
+    (2, 1, 1, 0, -810, 2616), (4, -1, -2, 0, 759, -1897),
+    (0, 2, -1, 0, -713, -2117), (2, 2, -1, 0, -700, 2354),
+    (2, 1, -2, 0, 691, 0), (2, -1, 0, -2, 596, 0),
+    (4, 0, 1, 0, 549, -1423), (0, 0, 4, 0, 537, -1117),
+    (4, -1, 0, 0, 520, -1571), (1, 0, -2, 0, -487, -1739),
+    (2, 1, 0, -2, -399, 0), (0, 0, 2, -2, -381, -4421),
+    (1, 1, 1, 0, 351, 0), (3, 0, -2, 0, -340, 0),
+    (4, 0, -3, 0, 330, 0), (2, -1, 2, 0, 327, 0),
+    (0, 2, 1, 0, -323, 1165), (1, 1, -1, 0, 299, 0),
+    (2, 0, 3, 0, 294, 0), (2, 0, -1, -2, 0, 8752),
+)
+
+#  (multiples of D, M, M', F, sum b coefficient)
+LATITUDETERMS = (
+    (0, 0, 0, 1, 5128122), (0, 0, 1, 1, 280602), (0, 0, 1, -1, 277693),
+    (2, 0, 0, -1, 173237), (2, 0, -1, 1, 55413), (2, 0, -1, -1, 46271),
+    (2, 0, 0, 1, 32573), (0, 0, 2, 1, 17198), (2, 0, 1, -1, 9266),
+    (0, 0, 2, -1, 8822), (2, -1, 0, -1, 8216), (2, 0, -2, -1, 4324),
+    (2, 0, 1, 1, 4200), (2, 1, 0, -1, -3359), (2, -1, -1, 1, 2463),
+    (2, -1, 0, 1, 2211), (2, -1, -1, -1, 2065), (0, 1, -1, -1, -1870),
+    (4, 0, -1, -1, 1828), (0, 1, 0, 1, -1794), (0, 0, 0, 3, -1749),
+    (0, 1, -1, 1, -1565), (1, 0, 0, 1, -1491), (0, 1, 1, 1, -1475),
+    (0, 1, 1, -1, -1410), (0, 1, 0, -1, -1344), (1, 0, 0, -1, -1335),
+    (0, 0, 3, 1, 1107), (4, 0, 0, -1, 1021), (4, 0, -1, 1, 833),
+    (0, 0, 1, -3, 777), (4, 0, -2, 1, 671), (2, 0, 0, -3, 607),
+    (2, 0, 2, -1, 596), (2, -1, 1, -1, 491), (2, 0, -2, 1, -451),
+    (0, 0, 3, -1, 439), (2, 0, 2, 1, 422), (2, 0, -3, -1, 421),
+    (2, 1, -1, 1, -366), (2, 1, 0, 1, -351), (4, 0, 0, 1, 331),
+    (2, -1, 1, 1, 315), (2, -2, 0, -1, 302), (0, 0, 1, 3, -283),
+    (2, 1, 1, -1, -229), (1, 1, 0, -1, 223), (1, 1, 0, 1, 223),
+    (0, 1, -2, -1, -220), (2, 1, -1, -1, -220), (1, 0, 1, 1, -185),
+    (2, -1, -2, -1, 181), (0, 1, 2, 1, -177), (4, 0, -2, -1, 176),
+    (4, -1, -1, -1, 166), (1, 0, 1, -1, -164), (4, 0, 1, -1, 132),
+    (1, 0, -1, -1, -119), (4, -1, 0, -1, 115), (2, -2, 0, 1, 107),
+)
+
+
+def moon_position(jde):
+    """ Geocentric ecliptic longitude and latitude (degrees, mean equinox
+        of the date) and distance (km) of the Moon at jde
+    """
+    # pylint: disable=too-many-locals
+    jul_time = (jde - 2451545.0) / 36525
+    jul_time2 = jul_time * jul_time
+    jul_time3 = jul_time2 * jul_time
+    jul_time4 = jul_time3 * jul_time
+
+    mean_long = (218.3164477 + 481267.88123421 * jul_time - 0.0015786 * jul_time2
+                 + jul_time3 / 538841 - jul_time4 / 65194000)
+    elong = radians(297.8501921 + 445267.1114034 * jul_time - 0.0018819 * jul_time2
+                    + jul_time3 / 545868 - jul_time4 / 113065000)
+    sun_anom = radians(357.5291092 + 35999.0502909 * jul_time - 0.0001536 * jul_time2
+                       + jul_time3 / 24490000)
+    moon_anom = radians(134.9633964 + 477198.8675055 * jul_time + 0.0087414 * jul_time2
+                        + jul_time3 / 69699 - jul_time4 / 14712000)
+    arg_lat = radians(93.2720950 + 483202.0175233 * jul_time - 0.0036539 * jul_time2
+                      - jul_time3 / 3526000 + jul_time4 / 863310000)
+    arg1 = radians(119.75 + 131.849 * jul_time)
+    arg2 = radians(53.09 + 479264.290 * jul_time)
+    arg3 = radians(313.45 + 481266.484 * jul_time)
+    ecc = 1 - 0.002516 * jul_time - 0.0000074 * jul_time2
+    eccs = (1.0, ecc, ecc * ecc)
+
+    sum_l = sum_r = sum_b = 0.0
+    for melong, msun, mmoon, mlat, coeff_l, coeff_r in LONGDISTTERMS:
+        angle = melong * elong + msun * sun_anom + mmoon * moon_anom + mlat * arg_lat
+        ecc_factor = eccs[abs(msun)]
+        sum_l += coeff_l * ecc_factor * sin(angle)
+        sum_r += coeff_r * ecc_factor * cos(angle)
+    for melong, msun, mmoon, mlat, coeff_b in LATITUDETERMS:
+        angle = melong * elong + msun * sun_anom + mmoon * moon_anom + mlat * arg_lat
+        sum_b += coeff_b * eccs[abs(msun)] * sin(angle)
+
+    mean_long_rad = radians(mean_long)
+    sum_l += 3958 * sin(arg1) + 1962 * sin(mean_long_rad - arg_lat) + 318 * sin(arg2)
+    sum_b += (-2235 * sin(mean_long_rad) + 382 * sin(arg3)
+              + 175 * sin(arg1 - arg_lat) + 175 * sin(arg1 + arg_lat)
+              + 127 * sin(mean_long_rad - moon_anom) - 115 * sin(mean_long_rad + moon_anom))
+
+    return (
+        fixangle(mean_long + sum_l / 1000000),
+        sum_b / 1000000,
+        385000.56 + sum_r / 1000,
+    )
+
+
+def sun_position(jde):
+    """ Apparent geocentric longitude (degrees, mean equinox of the date,
+        corrected for aberration only) and distance (km) of the Sun at jde
+    """
+    jul_time = (jde - 2451545.0) / 36525
+    mean_long = 280.46646 + 36000.76983 * jul_time + 0.0003032 * jul_time ** 2
+    anom = 357.52911 + 35999.05029 * jul_time - 0.0001537 * jul_time ** 2
+    ecc = 0.016708634 - 0.000042037 * jul_time - 0.0000001267 * jul_time ** 2
+    anom_rad = radians(anom)
+    centre = ((1.914602 - 0.004817 * jul_time - 0.000014 * jul_time ** 2) * sin(anom_rad)
+              + (0.019993 - 0.000101 * jul_time) * sin(2 * anom_rad)
+              + 0.000289 * sin(3 * anom_rad))
+    true_anom = radians(anom + centre)
+    radius = 1.000001018 * (1 - ecc * ecc) / (1 + ecc * cos(true_anom))
+    return fixangle(mean_long + centre - 0.00569), radius * AU
+
+
+def phase(pdate):
+    """ Same as astro.phase(), from the chapter 47 and 25 positions, with
+        the illuminated fraction from the true phase angle (chapter 48)
+    """
+    jde = pdate + delta_t_days(pdate)
+    moon_long, moon_lat, moon_dist = moon_position(jde)
+    sun_long, sun_dist = sun_position(jde)
+
+    moon_age = fixangle(moon_long - sun_long)
+    elong = cos(radians(moon_lat)) * cos(radians(moon_age))
+    phase_angle = atan2(sun_dist * sqrt(max(1 - elong * elong, 0.0)),
+                        moon_dist - sun_dist * elong)
+
+    return (
+        moon_age / 360.0,
+        (1 + cos(phase_angle)) / 2,
+        SYNMONTH * (moon_age / 360.0),
+        moon_dist,
+        2 * degrees(asin(MOONRADIUS / moon_dist)),
+        sun_dist,
+        2 * degrees(asin(SUNRADIUS / sun_dist)),
+    )
@@ -0,0 +1,289 @@
+""" Metrics of pyphoon embedded in a long-running process.
+
+    Call counts and latency histograms of the instrumented functions
+    (phase(), terminator_phase(), phasehunt2(), putmoon(), MoonRenderer
+    .render()) and the hits, misses and evictions of every cache layer,
+    as a snapshot() or in the Prometheus text format.
+
+    Metrics are off by default: until enable() is called an instrumented
+    function only pays for a wrapper call and a flag test (a fraction of
+    a microsecond).  Cache statistics are read from the caches themselves
+    when a snapshot is taken, and cost nothing in between.
+"""
+
+import os
+import functools
+from _thread import allocate_lock  # cheaper to import than threading
+from bisect import bisect_left
+from time import perf_counter
+from types import MethodType
+
+ENABLED = False
+
+PREFIX = 'pyphoon_'
+
+# Upper bounds of the latency buckets, seconds
+LATENCY_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025,
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+)
+
+_LOCK = allocate_lock()
+_METRICS = {}
+_CACHES = {}
+
+
+def enable():
+    """ Start collecting metrics
+    """
+    global ENABLED  # pylint: disable=global-statement
+    ENABLED = True
+
+
+def disable():
+    """ Stop collecting metrics; what was collected is kept
+    """
+    global ENABLED  # pylint: disable=global-statement
+    ENABLED = False
+
+
+class Counter:
+    """ Monotonic counter
+    """
+    __slots__ = ('name', 'help', '_value', '_lock')
+    type = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._value = 0
+        self._lock = allocate_lock()
+
+    def inc(self, amount=1):
+        """ Add amount to the counter
+        """
+        with self._lock:
+            self._value += amount
+
+    def samples(self):
+        """ (suffix, labels, value) of the current value
+        """
+        return [('', {}, self._value)]
+
+
+class Histogram:
+    """ Distribution of observed values over fixed buckets
+    """
+    __slots__ = ('name', 'help', 'buckets', '_counts', '_sum', '_lock')
+    type = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = allocate_lock()
+
+    def observe(self, value):
+        """ Count value in its bucket
+        """
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+
+    def samples(self):
+        """ (suffix, labels, value) of the cumulative buckets, the sum and
+            the count, Prometheus style
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            samples.append(('_bucket', {'le': _format_value(bound)}, cumulative))
+        samples.append(('_sum', {}, total))
+        samples.append(('_count', {}, cumulative))
+        return samples
+
+
+def _register(cls, name, help_text, *args):
+    """ Return the metric called name, created if needed
+    """
+    name = PREFIX + name
+    with _LOCK:
+        metric = _METRICS.get(name)
+        if metric is None:
+            metric = _METRICS[name] = cls(name, help_text, *args)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"{name} is already a {metric.type}")
+    return metric
+
+
+def counter(name, help_text):
+    """ The Counter called name (without PREFIX)
+    """
+    return _register(Counter, name, help_text)
+
+
+def histogram(name, help_text, buckets=LATENCY_BUCKETS):
+    """ The Histogram called name (without PREFIX)
+    """
+    return _register(Histogram, name, help_text, buckets)
+
+
+def timed(name, help_text):
+    """ Decorator recording the latency of each call in a histogram,
+        while metrics are enabled
+    """
+    def decorate(func):
+        hist = histogram(name, help_text)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.observe(perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def register_cache(name, info):
+    """ Report the statistics of a cache layer under the label cache=name.
+
+        info is called at snapshot time and returns a functools cache_info()
+        or a dict with hits, misses and optionally evictions and size.
+        Bound methods are held weakly: the cache goes away with its owner.
+    """
+    if isinstance(info, MethodType):
+        from weakref import WeakMethod  # pylint: disable=import-outside-toplevel
+        info = WeakMethod(info)
+    else:
+        info = _strong_ref(info)
+    with _LOCK:
+        _CACHES[name] = info
+
+
+def unregister_cache(name, info=None):
+    """ Stop reporting the cache layer name, if it is still the one of
+        info (when given): another cache may have taken the name since
+    """
+    with _LOCK:
+        ref = _CACHES.get(name)
+        if ref is not None and (info is None or ref() == info):
+            del _CACHES[name]
+
+
+def _strong_ref(obj):
+    """ Callable returning obj, like a weak reference that never dies
+    """
+    return lambda: obj
+
+
+def _cache_stats():
+    """ {cache name: stats dict} of the live caches
+    """
+    with _LOCK:
+        caches = list(_CACHES.items())
+    result = {}
+    for name, ref in caches:
+        info = ref()
+        if info is None:
+            with _LOCK:
+                if _CACHES.get(name) is ref:
+                    del _CACHES[name]
+            continue
+        stats = info()
+        if hasattr(stats, '_asdict'):
+            stats = {'hits': stats.hits, 'misses': stats.misses, 'size': stats.currsize}
+        result[name] = stats
+    return result
+
+
+CACHE_METRICS = (
+    ('hits', 'cache_hits_total', 'counter', 'Lookups answered by the cache'),
+    ('misses', 'cache_misses_total', 'counter', 'Lookups not answered by the cache'),
+    ('evictions', 'cache_evictions_total', 'counter', 'Entries dropped to make room'),
+    ('size', 'cache_entries', 'gauge', 'Entries in the cache'),
+)
+
+
+def snapshot():
+    """ Current value of every metric.
+
+        Return {name: {'type': ..., 'help': ..., 'samples': [(name, labels,
+        value), ...]}}, with the full sample names, as in the exposition
+        format.
+    """
+    with _LOCK:
+        metrics = list(_METRICS.values())
+    result = {}
+    for metric in metrics:
+        result[metric.name] = {
+            'type': metric.type,
+            'help': metric.help,
+            'samples': [(metric.name + suffix, labels, value)
+                        for suffix, labels, value in metric.samples()],
+        }
+
+    caches = _cache_stats()
+    for key, name, kind, help_text in CACHE_METRICS:
+        name = PREFIX + name
+        samples = [(name, {'cache': cache}, stats[key])
+                   for cache, stats in sorted(caches.items()) if key in stats]
+        if samples:
+            result[name] = {'type': kind, 'help': help_text, 'samples': samples}
+    return result
+
+
+def _format_value(value):
+    """ Number in the exposition format
+    """
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    """ {name: value} as {name="value",...}, escaped
+    """
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def to_prometheus(metrics=None):
+    """ snapshot() (or the given one) in the Prometheus text format
+    """
+    if metrics is None:
+        metrics = snapshot()
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for sample, labels, value in metric['samples']:
+            lines.append(f'{sample}{_format_labels(labels)} {_format_value(value)}')
+    return ''.join(line + '\n' for line in lines)
+
+
+def write_prometheus(path):
+    """ Write to_prometheus() to path, atomically, e.g. for the textfile
+        collector of the node exporter
+    """
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as stream:
+        stream.write(to_prometheus())
+    os.replace(tmp, path)
@@ -257,3 +257,16 @@ background32 = [
     r"                   `----.        .       .----'                  ",
     r"                         `--------------'                        "
 ]
+
+# Canned backgrounds by number of lines
+BACKGROUNDS = {
+    6: background6,
+    18: background18,
+    19: background19,
+    21: background21,
+    22: background22,
+    23: background23,
+    24: background24,
+    29: background29,
+    32: background32,
+}
@@ -0,0 +1,247 @@
+""" Live moon pushed to many subscribers (`pyphoon --publish ADDRESS`).
+
+    The frame is computed once, at the instants when it changes: the next
+    change is found by probing ahead at growing steps until the drawing
+    would differ (MoonRenderer.frame_key()), then by bisection down to
+    RESOLUTION.  With text that is about every second (the countdowns),
+    without text every few minutes (a column of the terminator).
+
+    Each new frame is encoded once per wire format and queued for every
+    subscriber of a Unix or TCP socket, so the work per frame does not
+    depend on how many there are.  A subscriber's queue holds QUEUESIZE
+    frames: when a slow client lets it fill up, its oldest frame is
+    dropped, and only its own writer task waits on its socket.
+
+    Wire formats, chosen by what the client sends first:
+
+      HTTP request    server-sent events (text/event-stream), one 'frame'
+                      event per frame, a 'data:' line per line of the moon,
+                      e.g. for EventSource or `curl -N`
+      nothing         plain text, each frame preceded by clear-screen, for
+                      a terminal: `socat - UNIX-CONNECT:ADDRESS`, `nc`
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+
+from src.lib import metrics
+from src.lib.astro import unix_to_julian, terminator_phase, phasehunt2
+
+QUEUESIZE = 4          # frames waiting for a subscriber
+RESOLUTION = 0.001     # seconds, precision of the change instants
+FIRSTSTEP = 1.0        # seconds, first probe ahead
+MAXSTEP = 3600.0       # seconds, longest probe ahead
+HANDSHAKE = 0.25       # seconds given to a client to send an HTTP request
+MAXREQUEST = 16384     # bytes of HTTP request headers read
+
+CLEAR = '\x1b[2J\x1b[H'
+
+SSEHEADER = (
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Type: text/event-stream; charset=utf-8\r\n'
+    b'Cache-Control: no-cache\r\n'
+    b'Connection: keep-alive\r\n'
+    b'\r\n'
+)
+
+FRAMES = metrics.counter('publish_frames_total', 'Frames published')
+DROPPED = metrics.counter('publish_dropped_frames_total',
+                          'Frames dropped from the queue of a slow subscriber')
+
+
+class Frame:
+    """ A published frame, encoded once per wire format
+    """
+    __slots__ = ('timestamp', 'text', '_sse', '_plain')
+
+    def __init__(self, timestamp, text):
+        self.timestamp = timestamp
+        self.text = text
+        self._sse = None
+        self._plain = None
+
+    def sse(self):
+        """ The frame as a server-sent event
+        """
+        if self._sse is None:
+            lines = ''.join(f'data: {line}\n' for line in self.text.rstrip('\n').split('\n'))
+            self._sse = f'event: frame\nid: {self.timestamp:.3f}\n{lines}\n'.encode()
+        return self._sse
+
+    def plain(self):
+        """ The frame as terminal output
+        """
+        if self._plain is None:
+            self._plain = (CLEAR + self.text).encode()
+        return self._plain
+
+
+class Publisher:
+    """ Compute the frames of renderer (a MoonRenderer) as time goes and
+        push them to the subscribers
+    """
+
+    def __init__(self, renderer, queue_size=QUEUESIZE, resolution=RESOLUTION, clock=time.time):
+        self.renderer = renderer
+        self.queue_size = queue_size
+        self.resolution = resolution
+        self.clock = clock
+        self.frame = None
+        self._queues = set()
+
+    @property
+    def subscribers(self):
+        """ Number of connected subscribers
+        """
+        return len(self._queues)
+
+    def key(self, timestamp):
+        """ What the frame looks like at timestamp (Unix time)
+        """
+        renderer = self.renderer
+        juliandate = unix_to_julian(timestamp)
+        phases = which = None
+        if renderer.has_text:
+            phases, which = phasehunt2(juliandate)
+        return renderer.frame_key(juliandate, terminator_phase(juliandate), phases, which)
+
+    def render(self, timestamp):
+        """ The frame at timestamp
+        """
+        return self.renderer.render(timestamp)
+
+    def next_change(self, timestamp):
+        """ The first instant after timestamp, within resolution, when the
+            frame differs from the one at timestamp
+        """
+        current = self.key(timestamp)
+        lower, step = timestamp, FIRSTSTEP
+        while self.key(lower + step) == current:
+            lower += step
+            step = min(step * 2, MAXSTEP)
+        upper = lower + step
+        while upper - lower > self.resolution:
+            middle = (lower + upper) / 2
+            if self.key(middle) == current:
+                lower = middle
+            else:
+                upper = middle
+        return upper
+
+    def broadcast(self, frame):
+        """ Queue frame for every subscriber, dropping the oldest queued
+            frame of those which are behind
+        """
+        self.frame = frame
+        FRAMES.inc()
+        for queue in self._queues:
+            if queue.full():
+                queue.get_nowait()
+                DROPPED.inc()
+            queue.put_nowait(frame)
+
+    async def run(self):
+        """ Publish the frames as they change, forever
+        """
+        timestamp = self.clock()
+        self.broadcast(Frame(timestamp, self.render(timestamp)))
+        while True:
+            change = self.next_change(timestamp)
+            await asyncio.sleep(max(change - self.clock(), 0.0))
+            # The clock may have jumped (suspend, NTP): catch up with it
+            timestamp = max(change, self.clock())
+            text = self.render(timestamp)
+            if text != self.frame.text:
+                self.broadcast(Frame(timestamp, text))
+
+    async def handle(self, reader, writer):
+        """ Serve one subscriber until it goes away
+        """
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), HANDSHAKE)
+        except asyncio.TimeoutError:
+            request = b''
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        sse = request.startswith(b'GET ')
+
+        queue = asyncio.Queue(self.queue_size)
+        if self.frame is not None:
+            queue.put_nowait(self.frame)
+        self._queues.add(queue)
+        try:
+            if sse:
+                writer.write(SSEHEADER)
+            while True:
+                frame = await queue.get()
+                writer.write(frame.sse() if sse else frame.plain())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Gone, or shutting down: asyncio.start_server() logs the
+            # cancellation of a handler as an error
+            pass
+        finally:
+            self._queues.discard(queue)
+            writer.close()
+
+
+def parse_address(address):
+    """ ('unix', path) or ('tcp', (host, port)) for ADDRESS: a path, or
+        HOST:PORT ([HOST]:PORT for IPv6)
+    """
+    host, colon, port = address.rpartition(':')
+    if colon and '/' not in address and port.isdigit():
+        return 'tcp', (host.strip('[]') or 'localhost', int(port))
+    return 'unix', address
+
+
+async def _is_alive(path):
+    """ Tell if some process is accepting connections on path
+    """
+    try:
+        _, writer = await asyncio.open_unix_connection(path)
+    except OSError:
+        return False
+    writer.close()
+    return True
+
+
+async def serve(renderer, address, queue_size=QUEUESIZE, ready=None):
+    """ Publish the frames of renderer on address (see parse_address())
+        until cancelled.  ready(server) is called once listening.
+    """
+    publisher = Publisher(renderer, queue_size)
+    kind, where = parse_address(address)
+    if kind == 'unix':
+        if os.path.exists(where):
+            if await _is_alive(where):
+                raise OSError(f"already publishing on {where}")
+            os.unlink(where)
+        server = await asyncio.start_unix_server(publisher.handle, where, limit=MAXREQUEST)
+    else:
+        server = await asyncio.start_server(publisher.handle, *where, limit=MAXREQUEST)
+
+    ticker = asyncio.ensure_future(publisher.run())
+    try:
+        async with server:
+            if ready is not None:
+                ready(server)
+            await asyncio.gather(server.serve_forever(), ticker)
+    finally:
+        ticker.cancel()
+        if kind == 'unix' and os.path.exists(where):
+            os.unlink(where)
+
+
+def publish(renderer, address, queue_size=QUEUESIZE):
+    """ Run serve() until interrupted or terminated
+    """
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(serve(renderer, address, queue_size))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,107 @@
+""" Vectorized drawing of very large moons.
+
+    The scalar renderer of src.pyphoon works a line at a time, and a
+    character at a time when the '@' cells are replaced by a custom
+    filler: above a few dozen lines most of a render is Python-level work
+    per cell.  Here the edges of all the lines come from one vectorized
+    sqrt(), the lit cells are a 2-D boolean mask merged with the
+    background characters, and the rows are decoded from the character
+    array in bulk.  The output is identical to the scalar renderer's.
+
+    Needs NumPy (see src.lib.vastro): callers check HAVE_NUMPY first.
+    MoonRenderer picks this engine by itself, see RASTERTHRESHOLD.
+"""
+
+from functools import lru_cache
+
+from src.lib.vastro import np, HAVE_NUMPY  # pylint: disable=unused-import
+
+# If you change the aspect ratio, the canned backgrounds won't work.
+ASPECTRATIO = 0.5
+
+SPACE = ord(' ')
+ATSIGN = ord('@')
+
+
+def edges(numlines, mcap, waxing):
+    """ (colleft, colright) arrays of the lit columns of every line, for
+        -cos() of the phase angle mcap, as MoonRenderer.edges() computes
+        them one line at a time
+    """
+    yrad = numlines / 2.0
+    xrad = yrad / ASPECTRATIO
+    xmid = int(xrad + 0.5)
+
+    ycoord = np.arange(numlines) + 0.5 - yrad
+    xright = xrad * np.sqrt(1.0 - (ycoord * ycoord) / (yrad * yrad))
+    xleft = -xright
+    if waxing:
+        xleft = mcap * xleft
+    else:
+        xright = mcap * xright
+    # int() truncates toward zero, as astype() does
+    return xmid + (xleft + 0.5).astype(np.int64), xmid + (xright + 0.5).astype(np.int64)
+
+
+def _codes(text, dtype):
+    """ Code points of text as an array of dtype
+    """
+    return np.array([ord(char) for char in text], dtype=dtype)
+
+
+@lru_cache(maxsize=32)
+def _background(background):
+    """ The background rows as a 2-D array of code points, padded with
+        spaces, and the lengths of the rows
+    """
+    width = max(len(row) for row in background)
+    cells = np.full((len(background), width), SPACE, dtype=np.uint32)
+    for lin, row in enumerate(background):
+        cells[lin, :len(row)] = _codes(row, np.uint32)
+    return cells, np.array([len(row) for row in background])
+
+
+def draw(moonshape, background, atfiller):
+    """ Lines of the moon, without line terminators: moonshape is the
+        (colleft, colright) lit columns of every line, as returned by
+        MoonRenderer.edges(), and background the rows of the canned
+        background or None
+    """
+    numlines = len(moonshape)
+    colleft, colright = np.array(moonshape, dtype=np.int64).reshape(numlines, 2).T
+
+    width = int(max(colleft.max(initial=0), colright.max(initial=0))) + 1
+    cells = None
+    if background is not None:
+        cells, lengths = _background(tuple(background))
+        width = max(width, cells.shape[1])
+        cells = np.pad(cells, ((0, 0), (0, width - cells.shape[1])), constant_values=SPACE)
+        # Slicing a row stops at its end
+        colright = np.minimum(colright, lengths - 1)
+
+    narrow = max(map(ord, atfiller)) < 256 and (cells is None or int(cells.max()) < 256)
+    dtype = np.uint8 if narrow else np.uint32
+    filler = _codes(atfiller, dtype)
+
+    cols = np.arange(width)
+    lit = (cols >= colleft[:, None]) & (cols <= colright[:, None])
+    grid = np.full((numlines, width), SPACE, dtype=dtype)
+    atsigns = lit
+    if cells is not None:
+        grid[lit] = cells[lit]
+        atsigns = lit & (cells == ATSIGN) if atfiller != '@' else None
+    if atsigns is not None:
+        # Each '@' takes the next filler character, row by row
+        if len(filler) == 1:
+            grid[atsigns] = filler[0]
+        else:
+            grid[atsigns] = filler[np.arange(np.count_nonzero(atsigns)) % len(filler)]
+
+    # A line stops after its last lit cell, or holds the leading spaces
+    # only if it has none
+    ends = np.where(colright >= colleft, colright + 1, colleft).tolist()
+    if dtype is np.uint8:
+        text = grid.tobytes().decode('latin-1')
+    else:
+        text = grid.astype('<u4').tobytes().decode('utf-32-le')
+    return [text[lin * width:lin * width + end] for lin, end in enumerate(ends)]
@@ -0,0 +1,345 @@
+""" Render cache shared by several processes.
+
+    Pre-forked workers each warming their own caches multiply the memory
+    use and split the hits between them.  SharedCache keeps rendered
+    frames (see MoonRenderer's cache argument) and phase event tables in
+    one memory-mapped file instead, created before the workers are forked
+    or opened by path from each of them.
+
+    Layout of the file:
+
+      header     magic, version, slots, slot size, counter rows, clock
+      counters   one row (pid, hits, misses, evictions) per process, each
+                 written by its owner only; row 0 gathers the counts of
+                 processes which are gone or found no free row
+      slots      a fixed-size open-addressing index: an entry lives in
+                 one of the PROBES slots following the hash of its key,
+                 with its key and value inline
+
+    Writers take an fcntl lock on the file.  Readers take no lock: each
+    slot starts with a sequence number, odd while the slot is being
+    written, and a read is only trusted if the number was even and
+    unchanged across it (a seqlock).  Inserting into a full probe window
+    evicts the oldest entry of that window, so eviction work is bounded
+    by PROBES whatever the size of the cache.
+"""
+
+import os
+import mmap
+import fcntl
+import struct
+import hashlib
+import tempfile
+import itertools
+import threading
+
+from src.lib import astro, metrics
+
+MAGIC = b'PYPHSHM1'
+VERSION = 1
+
+DEFAULTSLOTS = 2048
+DEFAULTSLOTSIZE = 4096   # bytes, key and value included
+DEFAULTWORKERS = 64      # counter rows
+
+PROBES = 8               # slots an entry may live in
+RETRIES = 16             # reads of a slot being written before giving up
+
+HEADER = struct.Struct('<8sIIII')     # magic, version, slots, slot_size, workers
+CLOCK = struct.Struct('<Q')           # insertion counter, right after HEADER
+COUNTERS = struct.Struct('<QQQQ')     # pid, hits, misses, evictions
+SLOT = struct.Struct('<QQQII')        # seq, hash, stamp, key length, value length
+SEQ = struct.Struct('<Q')
+
+HITS, MISSES, EVICTIONS = 1, 2, 3
+
+EVENTS = struct.Struct('<5d')
+
+# Numbers of the anonymous caches, which name their metrics
+_ANONYMOUS = itertools.count(1)
+
+
+def _digest(key):
+    """ Hash of key, stable across processes (unlike hash())
+    """
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def _shm_dir():
+    """ Directory for anonymous cache files: RAM-backed if possible
+    """
+    return '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+class SharedCache:  # pylint: disable=too-many-instance-attributes
+    """ Fixed-size cache of bytes keyed by bytes, shared by processes.
+
+        path: file to map, created if needed; the geometry of an existing
+              file wins over the arguments.  Without a path an anonymous
+              (already unlinked) file is used, which only processes forked
+              after the cache was created can share.
+        slots, slot_size: number and size of the entries; values which
+              don't fit in a slot along with their key are not cached.
+        workers: number of processes with counters of their own.
+    """
+
+    def __init__(self, path=None, slots=DEFAULTSLOTS, slot_size=DEFAULTSLOTSIZE,
+                 workers=DEFAULTWORKERS):
+        if slots < PROBES or slot_size <= SLOT.size or workers < 1:
+            raise ValueError("cache too small")
+        if path is None:
+            fd, tmp = tempfile.mkstemp(prefix='pyphoon-', dir=_shm_dir())
+            os.unlink(tmp)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.path = path
+        self._fd = fd
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    self._format(slots, slot_size, workers)
+                self._map()
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._pid = None
+        self._row = 0
+        self._lock = self._count_lock = None
+        self._attach()
+        self._metrics_name = f'shared:{path}' if path is not None else f'shared-{next(_ANONYMOUS)}'
+        metrics.register_cache(self._metrics_name, self.stats)
+
+    def _layout(self, slots, slot_size, workers):
+        """ Offsets of the counter rows and of the slots, and file size
+        """
+        counters = HEADER.size + CLOCK.size
+        first_slot = -(-(counters + (workers + 1) * COUNTERS.size) // 64) * 64
+        return counters, first_slot, first_slot + slots * slot_size
+
+    def _format(self, slots, slot_size, workers):
+        """ Size and initialize a new cache file
+        """
+        size = self._layout(slots, slot_size, workers)[2]
+        os.ftruncate(self._fd, size)
+        os.pwrite(self._fd, HEADER.pack(MAGIC, VERSION, slots, slot_size, workers), 0)
+
+    def _map(self):
+        """ Map the file and read its geometry
+        """
+        head = os.pread(self._fd, HEADER.size, 0)
+        magic, version, slots, slot_size, workers = HEADER.unpack(head)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a pyphoon cache: {self.path}")
+        self.slots = slots
+        self.slot_size = slot_size
+        self.workers = workers
+        self._counters, self._first_slot, size = self._layout(slots, slot_size, workers)
+        self._buf = mmap.mmap(self._fd, size)
+
+    def close(self):
+        """ Unmap the cache; the file itself is left alone
+        """
+        if self._buf is not None:
+            metrics.unregister_cache(self._metrics_name, self.stats)
+            self._buf.close()
+            self._buf = None
+            os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Counters
+
+    def _claim_row(self):
+        """ Find a counter row for this process, called under the file lock.
+            Rows of dead processes are folded into row 0 and reused.
+        """
+        buf = self._buf
+        free = 0
+        for row in range(1, self.workers + 1):
+            offset = self._counters + row * COUNTERS.size
+            pid = COUNTERS.unpack_from(buf, offset)[0]
+            if pid == os.getpid():
+                return row
+            if pid:
+                try:
+                    os.kill(pid, 0)
+                    continue
+                except ProcessLookupError:
+                    self._fold(row)
+                except PermissionError:
+                    continue
+            if not free:
+                free = row
+        if free:
+            COUNTERS.pack_into(buf, self._counters + free * COUNTERS.size, os.getpid(), 0, 0, 0)
+        return free
+
+    def _fold(self, row):
+        """ Add the counts of row to row 0 and free it
+        """
+        buf = self._buf
+        offset = self._counters + row * COUNTERS.size
+        _, hits, misses, evictions = COUNTERS.unpack_from(buf, offset)
+        _, total_hits, total_misses, total_evictions = COUNTERS.unpack_from(buf, self._counters)
+        COUNTERS.pack_into(buf, self._counters, 0, total_hits + hits,
+                           total_misses + misses, total_evictions + evictions)
+        COUNTERS.pack_into(buf, offset, 0, 0, 0, 0)
+
+    def _attach(self):
+        """ Get a counter row and fresh thread locks for this process,
+            once after creation and once after each fork
+        """
+        if self._pid == os.getpid():
+            return
+        # fcntl locks don't exclude the threads of one process
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+        with self._locked():
+            self._row = self._claim_row()
+        self._pid = os.getpid()
+
+    def _count(self, field):
+        """ Increment a counter of this process
+        """
+        offset = self._counters + self._row * COUNTERS.size + field * 8
+        if self._row:
+            with self._count_lock:
+                SEQ.pack_into(self._buf, offset, SEQ.unpack_from(self._buf, offset)[0] + 1)
+        else:
+            with self._locked():
+                SEQ.pack_into(self._buf, offset, SEQ.unpack_from(self._buf, offset)[0] + 1)
+
+    def stats(self):
+        """ Hits, misses and evictions of all the processes using the cache,
+            nothing once it is closed
+        """
+        if self._buf is None:
+            return {}
+        totals = [0, 0, 0]
+        for row in range(self.workers + 1):
+            counts = COUNTERS.unpack_from(self._buf, self._counters + row * COUNTERS.size)
+            for idx in range(3):
+                totals[idx] += counts[idx + 1]
+        return dict(zip(('hits', 'misses', 'evictions'), totals))
+
+    # Entries
+
+    def _locked(self):
+        """ Context manager holding the write lock
+        """
+        return _WriteLock(self._lock, self._fd)
+
+    def _window(self, digest):
+        """ Offsets of the slots an entry of hash digest may live in
+        """
+        first = digest % self.slots
+        for idx in range(first, first + PROBES):
+            yield self._first_slot + (idx % self.slots) * self.slot_size
+
+    def get(self, key):
+        """ The value stored for key, or None
+        """
+        self._attach()
+        buf = self._buf
+        digest = _digest(key)
+        for offset in self._window(digest):
+            for _ in range(RETRIES):
+                seq, slot_hash, _, keylen, vallen = SLOT.unpack_from(buf, offset)
+                if seq & 1:
+                    continue
+                if seq == 0:
+                    self._count(MISSES)
+                    return None
+                if slot_hash != digest:
+                    break
+                data = buf[offset + SLOT.size:offset + SLOT.size + keylen + vallen]
+                if SEQ.unpack_from(buf, offset)[0] != seq:
+                    continue
+                if data[:keylen] == key:
+                    self._count(HITS)
+                    return data[keylen:]
+                break
+        self._count(MISSES)
+        return None
+
+    def put(self, key, value):
+        """ Store value for key.  Return False if it doesn't fit in a slot.
+        """
+        if SLOT.size + len(key) + len(value) > self.slot_size:
+            return False
+        self._attach()
+        buf = self._buf
+        digest = _digest(key)
+        evicted = False
+        with self._locked():
+            victim = oldest = None
+            for offset in self._window(digest):
+                seq, slot_hash, stamp, keylen, _ = SLOT.unpack_from(buf, offset)
+                if seq == 0 or (slot_hash == digest
+                                and buf[offset + SLOT.size:offset + SLOT.size + keylen] == key):
+                    victim = offset
+                    break
+                if oldest is None or stamp < oldest:
+                    victim, oldest = offset, stamp
+            else:
+                evicted = True
+
+            clock = self._counters - CLOCK.size
+            stamp = CLOCK.unpack_from(buf, clock)[0] + 1
+            CLOCK.pack_into(buf, clock, stamp)
+
+            seq = SEQ.unpack_from(buf, victim)[0]
+            SEQ.pack_into(buf, victim, seq + 1)
+            start = victim + SLOT.size
+            buf[start:start + len(key) + len(value)] = key + value
+            SLOT.pack_into(buf, victim, seq + 1, digest, stamp, len(key), len(value))
+            SEQ.pack_into(buf, victim, seq + 2)
+        if evicted:
+            self._count(EVICTIONS)
+        return True
+
+    # Phase event tables
+
+    def phasehunt2(self, sdate, accuracy=None):
+        """ astro.phasehunt2() with the phases of the lunation shared
+        """
+        accuracy = accuracy or astro.ACCURACY
+        k = astro.lunation(sdate)
+        key = f'events|{accuracy}|{k!r}'.encode()
+        table = self.get(key)
+        if table is None:
+            phases5 = astro.lunation_phases(k, accuracy)
+            self.put(key, EVENTS.pack(*phases5))
+        else:
+            phases5 = EVENTS.unpack(table)
+        return astro.surrounding_phases(sdate, phases5)
+
+
+class _WriteLock:
+    """ A thread lock and an exclusive fcntl lock on a file, as a
+        context manager
+    """
+    __slots__ = ('_lock', '_fd')
+
+    def __init__(self, lock, fd):
+        self._lock = lock
+        self._fd = fd
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
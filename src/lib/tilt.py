@@ -0,0 +1,150 @@
+""" Moon drawn at an arbitrary tilt, as seen from a given latitude.
+
+    Near its culmination the Moon's lit limb faces the Sun along the
+    ecliptic, which stands at about (90 - latitude) degrees from the
+    horizon.  The north-up picture (latitude +90) is thus turned clockwise
+    by `position_angle(latitude)`: 90 degrees (lit limb down) on the
+    equator and 180 degrees (upside-down) at latitude -90.
+
+    Rotating the picture needs trigonometry for every cell, so it is done
+    once per (numlines, angle bucket) and cached: for each cell we keep the
+    background character found at its rotated position and the slope of
+    that position relative to the limb, which reduces the lit test done on
+    every render to a single comparison.
+"""
+
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from math import cos, sin, sqrt, radians, inf
+
+from src.lib import metrics
+from src.lib.moons import BACKGROUNDS
+from src.lib.rotate import rotate
+
+ANGLE_STEP = 5  # Width of the angle buckets, degrees
+
+# If you change the aspect ratio, the canned backgrounds won't work.
+ASPECTRATIO = 0.5
+
+
+def position_angle(latitude):
+    """ Clockwise rotation of the north-up moon seen from latitude (degrees)
+    """
+    if not -90.0 <= latitude <= 90.0:
+        raise ValueError(f"latitude out of range: {latitude}")
+    return 90.0 - latitude
+
+
+def angle_bucket(angle):
+    """ Quantize angle (degrees) to the nearest bucket, in [0, 360)
+    """
+    return int(round(angle / ANGLE_STEP)) * ANGLE_STEP % 360
+
+
+@lru_cache(maxsize=128)
+def geometry(numlines, bucket):
+    """ Rotated background and limb geometry of a numlines moon.
+
+        Return one tuple per line of (char, slope) pairs, one pair per
+        column; char is None outside of the disc.  slope is the moon-frame
+        abscissa of the cell divided by the half-width of the disc at the
+        cell's moon-frame ordinate, i.e. -1 on the left limb and +1 on the
+        right one.
+    """
+    yrad = numlines / 2.0
+    xrad = yrad / ASPECTRATIO
+    xmid = int(xrad + 0.5)
+    theta = radians(bucket)
+    cos_t, sin_t = cos(theta), sin(theta)
+    background = BACKGROUNDS.get(numlines)
+    upside_down = 90 < bucket < 270
+
+    lines = []
+    for lin in range(numlines):
+        ycoord = (lin + 0.5 - yrad) / yrad
+        cells = []
+        for col in range(2 * xmid + 1):
+            xcoord = (col - xmid) / xrad
+            if xcoord * xcoord + ycoord * ycoord > 1.0:
+                cells.append((None, 0.0))
+                continue
+
+            # Screen (y down) to moon frame: undo the clockwise rotation
+            ucoord = xcoord * cos_t + ycoord * sin_t
+            vcoord = -xcoord * sin_t + ycoord * cos_t
+            halfwidth = sqrt(max(1.0 - vcoord * vcoord, 0.0))
+            slope = ucoord / halfwidth if halfwidth > 1e-9 else 0.0
+
+            if background is None:
+                char = '@'
+            else:
+                srclin = min(max(int(vcoord * yrad + yrad), 0), numlines - 1)
+                row = background[srclin]
+                srccol = min(max(xmid + int(round(ucoord * xrad)), 0), len(row) - 1)
+                char = row[srccol]
+                if upside_down:
+                    char = rotate(char)
+            cells.append((char, slope))
+
+        while cells and cells[-1][0] is None:
+            cells.pop()
+        lines.append(tuple(cells))
+    return tuple(lines)
+
+
+@lru_cache(maxsize=128)
+def slopes(numlines, bucket):
+    """ Sorted slopes of the cells inside the disc of geometry()
+    """
+    return tuple(sorted(
+        slope for cells in geometry(numlines, bucket) for char, slope in cells if char is not None
+    ))
+
+
+def shape(numlines, angle, pctphase):
+    """ What render() draws at pctphase, as (waxing, limit): the cells of
+        the waxing (waning) moon whose slope is below (above) limit are
+        dark.  limit is one of the slopes of the disc, so that all the
+        phases which light the same cells have the same shape.
+    """
+    mcap = -cos(pctphase * 2.0 * 3.14159265358979323846)
+    cells = slopes(numlines, angle_bucket(angle))
+    if pctphase < 0.5:
+        idx = bisect_left(cells, -mcap)
+        return True, cells[idx] if idx < len(cells) else inf
+    idx = bisect_right(cells, mcap)
+    return False, cells[idx - 1] if idx else -inf
+
+
+def render_shape(numlines, angle, moonshape, atfiller):
+    """ Render the moon rotated clockwise by angle (degrees) with the lit
+        part given by shape().  Return the lines, without line terminators.
+    """
+    waxing, limit = moonshape
+    atflrlen = len(atfiller)
+    atflridx = 0
+
+    lines = []
+    for cells in geometry(numlines, angle_bucket(angle)):
+        line = []
+        for char, slope in cells:
+            if char is None or (slope < limit if waxing else slope > limit):
+                line.append(' ')
+            elif char != '@':
+                line.append(char)
+            else:
+                line.append(atfiller[atflridx])
+                atflridx = (atflridx + 1) % atflrlen
+        lines.append(''.join(line).rstrip(' '))
+    return lines
+
+
+def render(numlines, angle, pctphase, atfiller):
+    """ Render the moon rotated clockwise by angle (degrees) at pctphase.
+        Return the lines, without line terminators.
+    """
+    return render_shape(numlines, angle, shape(numlines, angle, pctphase), atfiller)
+
+
+metrics.register_cache('tilt_geometry', geometry.cache_info)
+metrics.register_cache('tilt_slopes', slopes.cache_info)
@@ -2,6 +2,8 @@
 """ Localization table
 """
 
+import os
+
 LITS = {
     # pylint: disable=line-too-long
     'en': ["New Moon", "First Quarter", "Full Moon", "Last Quarter", "Northern Hemisphere", "Southern Hemisphere"],
@@ -39,3 +41,47 @@ LITS = {
     'cy': ["Lleuad Newydd", "Chwarter Cyntaf", "Lleuad Llawn", "Chwarter Olaf", "Hemisffer y Gogledd", "Hemisffer y De"],
     'tr': ["Yeni Ay", "İlk Dördün", "Dolunay", "Son Dördün", "Kuzey yarımküre", "Güney yarımküre"],
 }
+
+
+def _environment_language():
+    """ LITS key of the locale set in the environment, without importing
+        locale (and re) when it is a plain C, POSIX or ll[_CC] locale.
+        None if locale.getdefaultlocale() must be asked.
+    """
+    for variable in ('LC_ALL', 'LC_CTYPE', 'LANG', 'LANGUAGE'):
+        value = os.environ.get(variable)
+        if value:
+            if variable == 'LANGUAGE':
+                value = value.split(':')[0]
+            break
+    else:
+        return 'en'
+
+    code = value.split('@', 1)[0].split('.', 1)[0]
+    if code in ('C', 'POSIX'):
+        return 'en'
+    language, _, country = code.partition('_')
+    if not (language.isalpha() and language.islower()
+            and (not country or country.isalpha() and country.isupper())):
+        return None
+    if code in LITS:
+        return code
+    return language if language in LITS else None
+
+
+def resolve_language(lang):
+    """ Return the LITS key to use for lang, the system locale if lang is empty
+    """
+    if not lang:
+        lang = _environment_language()
+    if not lang:
+        import locale  # pylint: disable=import-outside-toplevel
+        try:
+            lang = locale.getdefaultlocale()[0] or 'en'
+        except (IndexError, ValueError):
+            lang = 'en'
+
+    if lang not in LITS and '_' in lang:
+        lang = lang.split('_', 1)[0]
+
+    return lang if lang in LITS else 'en'
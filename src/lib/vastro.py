@@ -0,0 +1,210 @@
+""" NumPy counterparts of the src.lib.astro routines.
+
+    Same algorithms and constants as the scalar versions, applied to whole
+    arrays of Julian dates at once.  NumPy is an optional dependency
+    (`pip install pyphoon[numpy]`); callers should check HAVE_NUMPY or be
+    ready for the ImportError raised by require_numpy().
+"""
+
+from src.lib.astro import (
+    EPOCH, ELONGE, ELONGP, ECCENT, SUNSMAX, SUNANGSIZ,
+    MMLONG, MMLONGP, MLNODE, MECC, MANGSIZ, MSMAX, SYNMONTH,
+)
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:  # pragma: no cover
+    np = None
+    HAVE_NUMPY = False
+
+
+def require_numpy():
+    """ Raise ImportError with a helpful message if NumPy is missing
+    """
+    if not HAVE_NUMPY:
+        raise ImportError("this feature needs NumPy: pip install numpy")
+
+
+def fixangle(ang):
+    """ Fix angles (array version)
+    """
+    return ang - 360.0 * np.floor(ang / 360.0)
+
+
+def kepler(angle, ecc):
+    """ KEPLER  --   Solve the equation of Kepler for an array of mean
+        anomalies (degrees), returning eccentric anomalies in radians.
+    """
+    epsilon = 1E-6
+    angle = np.radians(angle)
+    theta = angle.copy()
+
+    while True:
+        delta = theta - ecc * np.sin(theta) - angle
+        theta -= delta / (1 - ecc * np.cos(theta))
+        if np.all(np.abs(delta) <= epsilon):
+            break
+
+    return theta
+
+
+def sun_position(pdate):
+    """ Array version of astro.sun_position() (default accuracy):
+        (day, epoch_1980, ecc, lambdasun) for an array of Julian dates
+    """
+    day = pdate - EPOCH
+    sun_mean_anom = fixangle((360 / 365.2422) * day)
+    epoch_1980 = fixangle(sun_mean_anom + ELONGE - ELONGP)
+    ecc = kepler(epoch_1980, ECCENT)
+    ecc = np.sqrt((1 + ECCENT) / (1 - ECCENT)) * np.tan(ecc / 2)
+    ecc = 2 * np.degrees(np.arctan(ecc))
+    lambdasun = fixangle(ecc + ELONGP)
+    return day, epoch_1980, ecc, lambdasun
+
+
+def moon_position(sun):
+    """ Array version of astro.moon_position():
+        (moon_anom_correct, centre_eq_correct, true_long)
+    """
+    day, epoch_1980, _, lambdasun = sun
+    moon_mean_long = fixangle(13.1763966 * day + MMLONG)
+    moon_mean_anom = fixangle(moon_mean_long - 0.1114041 * day - MMLONGP)
+    evection = 1.2739 * np.sin(np.radians(2 * (moon_mean_long - lambdasun) - moon_mean_anom))
+    ann_eq = 0.1858 * np.sin(np.radians(epoch_1980))
+    correction1 = 0.37 * np.sin(np.radians(epoch_1980))
+    moon_anom_correct = moon_mean_anom + evection - ann_eq - correction1
+    centre_eq_correct = 6.2886 * np.sin(np.radians(moon_anom_correct))
+    correction2 = 0.214 * np.sin(np.radians(2 * moon_anom_correct))
+    long_correct = moon_mean_long + evection + centre_eq_correct - ann_eq + correction2
+    variation = 0.6583 * np.sin(np.radians(2 * (long_correct - lambdasun)))
+    true_long = long_correct + variation
+    return moon_anom_correct, centre_eq_correct, true_long
+
+
+def node_position(sun):
+    """ Array version of astro.node_position()
+    """
+    day, epoch_1980, _, _ = sun
+    return fixangle(MLNODE - 0.0529539 * day) - 0.16 * np.sin(np.radians(epoch_1980))
+
+
+def _dsin(deg):
+    """ sin(degrees)
+    """
+    return np.sin(np.radians(deg))
+
+
+def _dcos(deg):
+    """ cos(degrees)
+    """
+    return np.cos(np.radians(deg))
+
+
+def truephase(k, moonphase):
+    """ TRUEPHASE  --  Array version of astro.truephase() (default
+        accuracy): true times of the phase moonphase (0.0, 0.25, 0.5 or
+        0.75) of the lunations in the array k
+    """
+    require_numpy()
+    if min(abs(moonphase - selector) for selector in (0.0, 0.25, 0.5, 0.75)) >= 0.01:
+        raise ValueError(f"invalid phase selector: {moonphase}")
+    k = np.asarray(k, dtype=np.float64) + moonphase
+    jul_time = k / 1236.85
+    jul_time2 = jul_time * jul_time
+    jul_time3 = jul_time2 * jul_time
+
+    phasetime = (
+        2415020.75933
+        + SYNMONTH * k
+        + 0.0001178 * jul_time2
+        - 0.000000155 * jul_time3
+        + 0.00033 * _dsin(166.56 + 132.87 * jul_time - 0.009173 * jul_time2)
+    )
+    sun_mean_anom = 359.2242 + 29.10535608 * k - 0.0000333 * jul_time2 - 0.00000347 * jul_time3
+    moon_mean_anom = 306.0253 + 385.81691806 * k + 0.0107306 * jul_time2 + 0.00001236 * jul_time3
+    moon_arg_lat = 21.2964 + 390.67050646 * k - 0.0016528 * jul_time2 - 0.00000239 * jul_time3
+
+    if moonphase < 0.01 or abs(moonphase - 0.5) < 0.01:
+        # Corrections for New and Full Moon
+        phasetime += (
+            (0.1734 - 0.000393 * jul_time) * _dsin(sun_mean_anom)
+            + 0.0021 * _dsin(2 * sun_mean_anom)
+            - 0.4068 * _dsin(moon_mean_anom)
+            + 0.0161 * _dsin(2 * moon_mean_anom)
+            - 0.0004 * _dsin(3 * moon_mean_anom)
+            + 0.0104 * _dsin(2 * moon_arg_lat)
+            - 0.0051 * _dsin(sun_mean_anom + moon_mean_anom)
+            - 0.0074 * _dsin(sun_mean_anom - moon_mean_anom)
+            + 0.0004 * _dsin(2 * moon_arg_lat + sun_mean_anom)
+            - 0.0004 * _dsin(2 * moon_arg_lat - sun_mean_anom)
+            - 0.0006 * _dsin(2 * moon_arg_lat + moon_mean_anom)
+            + 0.0010 * _dsin(2 * moon_arg_lat - moon_mean_anom)
+            + 0.0005 * _dsin(sun_mean_anom + 2 * moon_mean_anom)
+        )
+    else:
+        phasetime += (
+            (0.1721 - 0.0004 * jul_time) * _dsin(sun_mean_anom)
+            + 0.0021 * _dsin(2 * sun_mean_anom)
+            - 0.6280 * _dsin(moon_mean_anom)
+            + 0.0089 * _dsin(2 * moon_mean_anom)
+            - 0.0004 * _dsin(3 * moon_mean_anom)
+            + 0.0079 * _dsin(2 * moon_arg_lat)
+            - 0.0119 * _dsin(sun_mean_anom + moon_mean_anom)
+            - 0.0047 * _dsin(sun_mean_anom - moon_mean_anom)
+            + 0.0003 * _dsin(2 * moon_arg_lat + sun_mean_anom)
+            - 0.0004 * _dsin(2 * moon_arg_lat - sun_mean_anom)
+            - 0.0006 * _dsin(2 * moon_arg_lat + moon_mean_anom)
+            + 0.0021 * _dsin(2 * moon_arg_lat - moon_mean_anom)
+            + 0.0003 * _dsin(sun_mean_anom + 2 * moon_mean_anom)
+            + 0.0004 * _dsin(sun_mean_anom - 2 * moon_mean_anom)
+            - 0.0003 * _dsin(2 * sun_mean_anom + moon_mean_anom)
+        )
+        sign = 1 if moonphase < 0.5 else -1  # First or last quarter correction
+        phasetime += sign * (0.0028 - 0.0004 * _dcos(sun_mean_anom) + 0.0003 * _dcos(moon_mean_anom))
+    return phasetime
+
+
+def phase(pdate):
+    """ PHASE  --  Array version of astro.phase().
+
+        pdate is an array of Julian dates; returns the same seven values
+        as astro.phase(), each one an array shaped like pdate:
+        (phase, moon_phase, mage, dist, angdia, sudist, suangdia)
+    """
+    require_numpy()
+    pdate = np.asarray(pdate, dtype=np.float64)
+
+    # Calculation of the Sun's position
+
+    sun = sun_position(pdate)
+    ecc, lambdasun = sun[2], sun[3]
+
+    orbital_dist = ((1 + ECCENT * np.cos(np.radians(ecc))) / (1 - ECCENT * ECCENT))
+    sun_dist = SUNSMAX / orbital_dist
+    sun_ang = orbital_dist * SUNANGSIZ
+
+    # Calculation of the Moon's position
+
+    moon_anom_correct, centre_eq_correct, true_long = moon_position(sun)
+
+    # Calculation of the phase of the Moon
+
+    moon_age = true_long - lambdasun
+    moon_dist = (
+        (MSMAX * (1 - MECC * MECC))
+        / (1 + MECC * np.cos(np.radians(moon_anom_correct + centre_eq_correct)))
+    )
+    moon_ang = MANGSIZ / (moon_dist / MSMAX)
+    moon_phase = (1 - np.cos(np.radians(moon_age))) / 2
+    fixed_age = fixangle(moon_age)
+
+    return (
+        fixed_age / 360.0,
+        moon_phase,
+        SYNMONTH * (fixed_age / 360.0),
+        moon_dist,
+        moon_ang,
+        sun_dist,
+        sun_ang,
+    )
@@ -0,0 +1,578 @@
+#!/usr/bin/env python
+"""
+pyphoon - Phase of the Moon (Python version)
+Igor Chubin <igor@chub.in>, 05.03.2016,
+
+Based on the original version of Jef Poskanzer <jef@mail.acme.com>
+written in Pascal in 1979 (and later translated to C)
+"""
+
+
+import sys
+import os
+import argparse
+import time
+from functools import lru_cache
+from math import cos, sqrt
+
+
+# sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "lib"))
+# sys.path.append((os.path.dirname(os.path.dirname(__file__))))
+# phase is no longer used here, but `from src import phase` keeps working
+from src.lib.astro import (unix_to_julian, phase, terminator_phase, phasehunt2,  # pylint: disable=unused-import
+                            set_accuracy, ACCURACIES)
+from src.lib.dates import (parse_timestamp, putseconds,  # pylint: disable=unused-import
+                           SECSPERMINUTE, SECSPERHOUR, SECSPERDAY)
+from src.lib.moons import BACKGROUNDS
+from src.lib.rotate import rotate
+from src.lib import tilt, metrics
+from src.lib.tilt import position_angle, angle_bucket
+from src.lib.translations import LITS, resolve_language
+
+def fatal(message):
+    """ Print error message and exit signaling failure
+    """
+    print(message, file=sys.stderr)
+    sys.exit(1)
+
+#
+# Global defines and declarations.
+#
+PI = 3.1415926535897932384626433
+
+DEFAULTNUMLINES = 23
+DEFAULTNOTEXT = False
+DEFAULTHEMISPHERE = 'north'
+
+QUARTERLITLEN = 16
+QUARTERLITLENPLUSONE = 17
+
+# If you change the aspect ratio, the canned backgrounds won't work.
+ASPECTRATIO = 0.5
+
+# Distinct drawings kept by MoonRenderer
+FRAMECACHESIZE = 256
+
+# Moons of this many lines or more which need per-cell work (a custom
+# filler or a background) are drawn by src.lib.raster if NumPy is there.
+# Above the canned backgrounds, where it is several times faster.
+RASTERTHRESHOLD = 40
+
+@lru_cache(maxsize=None)
+def background_table(numlines, south):
+    """ Background rows of a numlines moon, turned upside-down for the
+        south hemisphere, or None if there is no canned background
+    """
+    background = BACKGROUNDS.get(numlines)
+    if background is None or not south:
+        return background
+    # south - read moons from bottom-right to upper-left
+    # equivalent to rotate 180 degress or turn upside-down
+    return tuple(
+        rotate(row[0] + row[:0:-1])
+        for row in reversed(background)
+    )
+
+
+def _raster_engine(numlines, atfiller, background, angle):
+    """ The src.lib.raster module if it draws such a moon faster, else None
+    """
+    if (numlines < RASTERTHRESHOLD or angle is not None
+            or (atfiller == '@' and background is None)):
+        # A plain '@' moon is drawn a line at a time by the scalar code
+        return None
+    from src.lib import raster  # pylint: disable=import-outside-toplevel
+    return raster if raster.HAVE_NUMPY else None
+
+
+class MoonRenderer:
+    """ Moon renderer, configured once and reused for many dates.
+
+        Everything that does not depend on the date (language, texts,
+        background table, tilt) is resolved by the constructor and never
+        modified afterwards, so render() may be called concurrently from
+        several threads.
+    """
+    __slots__ = (
+        'numlines', 'atfiller', 'notext', 'lang', 'hemisphere',
+        'hemisphere_warning', 'latitude',
+        '_qlits', '_nqlits', '_hemisphere_msg', '_background', '_angle',
+        '_cache', '_cache_key', '_raster',
+    )
+
+    def __init__(self, numlines=DEFAULTNUMLINES, atfiller='@', notext=DEFAULTNOTEXT,  # pylint: disable=too-many-arguments
+                 lang=None, hemisphere=DEFAULTHEMISPHERE, hemisphere_warning=False,
+                 latitude=None, cache=None):
+        """ hemisphere_warning: show which hemisphere the moon is seen from
+            latitude: tilt the moon as seen from there (hemisphere is then
+                      derived from its sign)
+            cache: a src.lib.shmcache.SharedCache to share the frames and
+                   the phase event tables with other processes
+        """
+        lang = resolve_language(lang)
+        lits = LITS[lang]
+
+        # Tilt the moon between the north-up and the south-up pictures
+        angle = None
+        if latitude is not None:
+            angle = position_angle(latitude)
+            hemisphere = 'south' if latitude < 0 else 'north'
+            if angle_bucket(angle) in (0, 180):
+                angle = None
+
+        # if LITS has hemisphere translation
+        if len(lits) >= 6:
+            north_south = lits[4:6]
+        else:
+            north_south = LITS.get('en')[4:6] #default to English
+
+        init = object.__setattr__
+        init(self, 'numlines', numlines)
+        init(self, 'atfiller', atfiller)
+        init(self, 'notext', notext)
+        init(self, 'lang', lang)
+        init(self, 'hemisphere', hemisphere)
+        init(self, 'hemisphere_warning', hemisphere_warning)
+        init(self, 'latitude', latitude)
+        init(self, '_qlits', tuple(x + " +" for x in lits[:4]))
+        init(self, '_nqlits', tuple(x + " -" for x in lits[:4]))
+        init(self, '_hemisphere_msg', f"[{north_south[hemisphere == 'south']}]")
+        init(self, '_background', background_table(numlines, hemisphere == 'south'))
+        init(self, '_angle', angle)
+        init(self, '_raster', _raster_engine(numlines, atfiller, self._background, angle))
+        init(self, '_cache', cache)
+        init(self, '_cache_key', '|'.join(
+            str(x) for x in ('frame', numlines, atfiller, notext, lang, hemisphere,
+                             hemisphere_warning, latitude)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def edges(self, pctphase):
+        """ Return the (colleft, colright) lit columns of every line
+            for the given terminator phase, as seen from the north
+        """
+        numlines = self.numlines
+        angphase = pctphase * 2.0 * PI
+        mcap = -cos(angphase)
+
+        if self._raster is not None:
+            colleft, colright = self._raster.edges(numlines, mcap, PI > angphase >= 0.0)
+            return tuple(zip(colleft.tolist(), colright.tolist()))
+
+        # Figure out how big the moon is
+        yrad = numlines / 2.0
+        xrad = yrad / ASPECTRATIO
+        xmid = int(xrad + 0.5)
+
+        edges = []
+        for lin in range(numlines):
+            # Compute the edges of this slice
+            ycoord = lin + 0.5 - yrad
+            xright = xrad * sqrt(1.0 - (ycoord * ycoord) / (yrad * yrad))
+            xleft = -xright
+            if PI > angphase >= 0.0:
+                xleft = mcap * xleft
+            else:
+                xright = mcap * xright
+
+            edges.append((xmid + int(xleft + 0.5), xmid + int(xright + 0.5)))
+        return tuple(edges)
+
+    def _settings(self):
+        """ Everything draw() depends on, besides its arguments
+        """
+        return (self.numlines, self.atfiller, self.notext, self.lang,
+                self.hemisphere, self.hemisphere_warning, self.latitude)
+
+    def __eq__(self, other):
+        if not isinstance(other, MoonRenderer):
+            return NotImplemented
+        return self._settings() == other._settings()
+
+    def __hash__(self):
+        return hash(self._settings())
+
+    @property
+    def has_text(self):
+        """ Tell if the moon is drawn with the phase information
+        """
+        return self.numlines <= 27 and not self.notext
+
+    @metrics.timed('render_seconds', 'Time spent in MoonRenderer.render()')
+    def render(self, timestamp):
+        """ Render the moon at timestamp (Unix time)
+        """
+        cache = self._cache
+        juliandate = unix_to_julian(timestamp)
+        pctphase = terminator_phase(juliandate)
+        phases = which = None
+        if self.has_text:
+            phases, which = phasehunt2(juliandate) if cache is None else cache.phasehunt2(juliandate)
+        return self.render_phase(juliandate, pctphase, phases, which)
+
+    def render_phase(self, juliandate, pctphase, phases, which):
+        """ Render the moon from already computed astronomy: pctphase as
+            returned by terminator_phase(juliandate), phases and which by
+            phasehunt2() (unused, and may be None, without text).
+
+            Dates that look the same on screen (same lit columns, same
+            countdowns) share their drawing through a bounded LRU cache,
+            see frame_cache_info(), and through the shared cache of the
+            renderer, if any, when it misses.
+        """
+        return _cached_draw(self, *self.frame_key(juliandate, pctphase, phases, which))
+
+    def frame_key(self, juliandate, pctphase, phases, which):
+        """ What render_phase() draws for these arguments, as the
+            (moonshape, texts) arguments of draw(): two dates look the
+            same on screen if and only if their keys are equal
+        """
+        if self._angle is not None:
+            moonshape = tilt.shape(self.numlines, self._angle, pctphase)
+        else:
+            # Fix waxes and wanes direction for south hemisphere
+            if self.hemisphere == 'south':
+                pctphase = 1 - pctphase
+            moonshape = self.edges(pctphase)
+
+        texts = None
+        if self.has_text:
+            texts = (
+                self._qlits[int(which[0] * 4.0 + 0.001)],
+                putseconds(int((juliandate - phases[0]) * SECSPERDAY)),
+                self._nqlits[int(which[1] * 4.0 + 0.001)],
+                putseconds(int((phases[1] - juliandate) * SECSPERDAY)),
+            )
+        return moonshape, texts
+
+    def draw(self, moonshape, texts):
+        """ Draw the moon: moonshape is the edges() of its lit part, or
+            tilt.shape() for a tilted moon, and texts the four lines of
+            phase information (or None)
+        """
+        numlines = self.numlines
+        atfiller = self.atfiller
+        atflrlen = len(atfiller)
+        background = self._background
+
+        if self._angle is not None:
+            slices = tilt.render_shape(numlines, self._angle, moonshape, atfiller)
+        elif self._raster is not None:
+            slices = self._raster.draw(moonshape, background, atfiller)
+        else:
+            # Now output the moon, a slice at a time
+            slices = []
+            atflridx = 0
+            for lin, (colleft, colright) in enumerate(moonshape):
+                if background is None:
+                    chars = '@' * (colright - colleft + 1)
+                else:
+                    chars = background[lin][colleft:colright + 1]
+                if atfiller != '@' and '@' in chars:
+                    chars = list(chars)
+                    for col, char in enumerate(chars):
+                        if char == '@':
+                            chars[col] = atfiller[atflridx]
+                            atflridx = (atflridx + 1) % atflrlen
+                    chars = ''.join(chars)
+                slices.append(' ' * colleft + chars)
+
+        if texts is None:
+            return ''.join(line + '\n' for line in slices)
+
+        # Output the end-of-line information, if any
+        midlin = int(numlines / 2)
+        texts = dict(zip(range(midlin - 2, midlin + 2), texts))
+        if self.hemisphere_warning:
+            texts[midlin + 2] = self._hemisphere_msg
+        return ''.join(
+            f"{line}\t {texts.get(lin, '')}\n" for lin, line in enumerate(slices)
+        )
+
+
+def _draw(renderer, moonshape, texts):
+    """ renderer.draw(moonshape, texts), through the shared cache of
+        renderer if it has one.  Shared frames are keyed by what is drawn,
+        as the local ones are: all the instants which look the same share
+        one entry.
+    """
+    cache = renderer._cache  # pylint: disable=protected-access
+    if cache is None:
+        return renderer.draw(moonshape, texts)
+    key = f'{renderer._cache_key}|{moonshape!r}|{texts!r}'.encode()  # pylint: disable=protected-access
+    frame = cache.get(key)
+    if frame is not None:
+        return frame.decode()
+    frame = renderer.draw(moonshape, texts)
+    cache.put(key, frame.encode())
+    return frame
+
+
+# Renders of dates which look the same share their drawing, and only
+# those missing from this process are looked for in a shared cache
+_cached_draw = lru_cache(maxsize=FRAMECACHESIZE)(_draw)
+
+metrics.register_cache('frames', _cached_draw.cache_info)
+metrics.register_cache('backgrounds', background_table.cache_info)
+
+
+def frame_cache_info():
+    """ Statistics of the drawing cache of MoonRenderer, as a dict with
+        hits, misses, size, maxsize and hit_rate
+    """
+    info = _cached_draw.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+    }
+
+
+def frame_cache_clear():
+    """ Empty the drawing cache of MoonRenderer
+    """
+    _cached_draw.cache_clear()
+
+
+@metrics.timed('putmoon_seconds', 'Time spent in putmoon()')
+def putmoon(datetimeobj, numlines, atfiller, notext, lang, hemisphere, hemisphere_warning,  # pylint: disable=too-many-arguments
+            latitude=None, cache=None):
+    """ Print the moon
+
+        If latitude is given, the moon is tilted as seen from there and
+        hemisphere is derived from its sign.  If cache (a SharedCache) is
+        given, frames are shared with the other processes using it.  Kept
+        for compatibility: MoonRenderer avoids resolving the settings again
+        for every date.
+    """
+    renderer = MoonRenderer(numlines, atfiller, notext, lang, hemisphere,
+                            hemisphere_warning != 'None', latitude, cache)
+    return renderer.render(datetimeobj)
+
+
+def main(argv=None):
+    """ Main entry point
+
+        :param argv: command line arguments, sys.argv[1:] by default
+    """
+    parser = argparse.ArgumentParser(description='Show Phase of the Moon')
+    parser.add_argument(
+        '-n', '--lines',
+        help='Number of lines to display (size of the moon)',
+        required=False,
+        default=DEFAULTNUMLINES
+    )
+    parser.add_argument(
+        '-x', '--notext',
+        help='Print no additional information, just the moon',
+        required=False,
+        default=DEFAULTNOTEXT,
+        action="store_true"
+    )
+    parser.add_argument(
+        'date',
+        help='Date for that the phase of the Moon must be shown. Today by default',
+        nargs='?',
+        default=time.strftime("%Y-%m-%d %H:%M:%S")
+    )
+    parser.add_argument(
+        '-l', '--language',
+        help='locale for that the phase of the Moon must be shown. English by default',
+        nargs='?',
+        default=None
+    )
+
+
+    hemisphere_group = parser.add_mutually_exclusive_group()
+    hemisphere_group.add_argument(
+        '-s', '--hemisphere',
+        help='Earth hemisphere from which to observe the Moon. North by default',
+        required=False,
+        choices=['north', 'south']
+    )
+
+    hemisphere_group.add_argument(
+        '-S', '--hemispherewarning',
+        help=('The same as -s and --hemisphere, but shows an hemisphere '
+              'reminder under the phase text.'
+             ),
+        required=False,
+        choices=['north', 'south']
+    )
+
+    hemisphere_group.add_argument(
+        '-L', '--latitude',
+        help=('Latitude of the observer in degrees (-90 to 90), '
+              'tilts the moon as seen from there'
+             ),
+        required=False,
+        type=float,
+        default=None
+    )
+
+    parser.add_argument(
+        '-a', '--accuracy',
+        help='Accuracy of the astronomical computations. default by default',
+        required=False,
+        choices=ACCURACIES,
+        default='default'
+    )
+
+    parser.add_argument(
+        '--daemon',
+        help=('Keep running in the background and serve pyphoon invocations '
+              'over a Unix socket ($PYPHOON_SOCKET)'
+             ),
+        required=False,
+        default=False,
+        action="store_true"
+    )
+
+    parser.add_argument(
+        '--record',
+        help='Write an asciinema (asciicast v2) recording of a whole lunation to RECORD',
+        metavar='RECORD',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--from',
+        help='First date of the recording. The date argument by default',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--frames',
+        help='Number of frames of the recording. 600 by default',
+        required=False,
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        '--publish',
+        help=('Push the live moon to any number of subscribers on ADDRESS, a Unix socket '
+              'path or HOST:PORT, as server-sent events or plain text'
+             ),
+        metavar='ADDRESS',
+        required=False,
+        default=None
+    )
+
+    parser.add_argument(
+        '--eclipses',
+        help=('List the new and full moons near a node of the Moon\'s orbit, '
+              'i.e. the possible solar and lunar eclipses, from date to UNTIL'
+             ),
+        metavar='UNTIL',
+        required=False,
+        default=None
+    )
+
+    parser.add_argument(
+        '--status',
+        help='Print a single status line (see --format) instead of the moon',
+        required=False,
+        default=False,
+        action="store_true"
+    )
+    parser.add_argument(
+        '--format',
+        help=('Format of the --status line, with the fields {emoji}, {illumination}, '
+              '{illuminated}, {age}, {previous}, {next}, {elapsed} and {countdown}'
+             ),
+        required=False,
+        default=None
+    )
+
+    args = vars(parser.parse_args(argv))
+
+    if args['daemon']:
+        from src.lib.daemon import serve  # pylint: disable=import-outside-toplevel
+        serve()
+        return
+
+    set_accuracy(args['accuracy'])
+
+    if args['record'] and args['from']:
+        args['date'] = args['from']
+
+    try:
+        dateobj = parse_timestamp(args['date'])
+    except Exception as err:  # pylint: disable=broad-except
+        fatal(f"Can't parse date: {args['date']}")
+
+    try:
+        numlines = int(args['lines'])
+        lang = args['language']
+    except Exception as err:  # pylint: disable=broad-except
+        print(err)
+        fatal("Number of lines must be integer")
+
+    try:
+        notext = bool(args['notext'])
+    except Exception as err:  # pylint: disable=broad-except
+        print(err)
+
+    try:
+        hemisphere = str(args['hemisphere'])
+    except Exception as err:  # pylint: disable=broad-except
+        print(err)
+
+    try:
+        hemisphere_warning = str(args['hemispherewarning'])
+    except Exception as err:  # pylint: disable=broad-except
+        print(err)
+
+    latitude = args['latitude']
+    if latitude is not None and not -90.0 <= latitude <= 90.0:
+        fatal("Latitude must be between -90 and 90")
+
+    if hemisphere == 'None':
+        hemisphere = hemisphere_warning if hemisphere_warning != 'None' else DEFAULTHEMISPHERE
+
+    if args['status']:
+        from src import status  # pylint: disable=import-outside-toplevel
+        try:
+            print(status.status_line(dateobj, args['format'] or status.DEFAULTFORMAT,
+                                     lang, hemisphere))
+        except (KeyError, ValueError, IndexError) as err:
+            fatal(f"Invalid status format: {err}")
+        return
+
+    if args['publish']:
+        from src.lib import publish  # pylint: disable=import-outside-toplevel
+        renderer = MoonRenderer(numlines, '@', notext, lang, hemisphere,
+                                hemisphere_warning != 'None', latitude)
+        try:
+            publish.publish(renderer, args['publish'])
+        except OSError as err:
+            fatal(f"Can't publish on {args['publish']}: {err}")
+        return
+
+    if args['eclipses']:
+        from src.lib import eclipse  # pylint: disable=import-outside-toplevel
+        try:
+            until = parse_timestamp(args['eclipses'])
+        except Exception as err:  # pylint: disable=broad-except
+            fatal(f"Can't parse date: {args['eclipses']}")
+        for found in eclipse.eclipses(unix_to_julian(dateobj), unix_to_julian(until)):
+            print(eclipse.describe(found))
+        return
+
+    if args['record']:
+        from src.lib import asciicast  # pylint: disable=import-outside-toplevel
+        frames = asciicast.DEFAULTFRAMES if args['frames'] is None else args['frames']
+        if frames <= 0:
+            fatal("Number of frames must be positive")
+        renderer = MoonRenderer(numlines, '@', notext, lang, hemisphere,
+                                hemisphere_warning != 'None', latitude)
+        with open(args['record'], 'w', encoding='utf-8') as stream:
+            asciicast.record(stream, renderer, dateobj, frames)
+        return
+
+    print(putmoon(dateobj, numlines, '@', notext, lang, hemisphere, hemisphere_warning, latitude))
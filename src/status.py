@@ -0,0 +1,136 @@
+""" pyphoon --status - one line for status bars
+
+    Prints the phase of the Moon as a single line, e.g. "🌔 73% Full Moon
+    3  4:12:09", from a format string.  Status bars run it every few
+    seconds, so this path is kept cheap: it is taken by src.main() before
+    argparse, the moon pictures and dateutil are imported, and only
+    computes the fields of phase() it shows.
+
+    Format fields:
+
+      {emoji}         phase glyph, mirrored for the southern hemisphere
+      {illumination}  illuminated fraction of the disc, percent (integer)
+      {illuminated}   illuminated fraction, 0 to 1 (e.g. {illuminated:.1%})
+      {age}           age of the Moon, days (e.g. {age:.1f})
+      {previous}      name of the last phase reached
+      {next}          name of the next phase
+      {elapsed}       time since the last phase, as 'dd HH:MM:SS'
+      {countdown}     time until the next phase, as 'dd HH:MM:SS'
+"""
+
+import sys
+import time
+
+from src.lib.astro import (unix_to_julian, phase, phasehunt2, set_accuracy,
+                           ACCURACIES)
+from src.lib.dates import parse_timestamp, putseconds, SECSPERDAY
+from src.lib.translations import LITS, resolve_language
+
+DEFAULTFORMAT = '{emoji} {illumination}% {next} {countdown}'
+
+# New moon, waxing crescent, first quarter, ..., waning crescent, as seen
+# from the northern hemisphere
+EMOJIS = ('\U0001F311', '\U0001F312', '\U0001F313', '\U0001F314',
+          '\U0001F315', '\U0001F316', '\U0001F317', '\U0001F318')
+
+# Options understood here, with the name of their value
+OPTIONS = {
+    '--status': None,
+    '--format': 'format',
+    '-l': 'language', '--language': 'language',
+    '-s': 'hemisphere', '--hemisphere': 'hemisphere',
+    '-a': 'accuracy', '--accuracy': 'accuracy',
+}
+
+
+def emoji(pctphase, hemisphere='north'):
+    """ Glyph of the terminator phase pctphase (0 to 1)
+    """
+    idx = int(pctphase * len(EMOJIS) + 0.5) % len(EMOJIS)
+    if hemisphere == 'south':
+        idx = -idx % len(EMOJIS)
+    return EMOJIS[idx]
+
+
+def status_fields(timestamp, lang=None, hemisphere='north'):
+    """ The format fields (see the module documentation) at timestamp
+    """
+    juliandate = unix_to_julian(timestamp)
+    result = phase(juliandate)
+    phases, which = phasehunt2(juliandate)
+    lits = LITS[resolve_language(lang)]
+    return {
+        'emoji': emoji(result.phase, hemisphere),
+        'illumination': int(result.illuminated * 100 + 0.5),
+        'illuminated': result.illuminated,
+        'age': result.age,
+        'previous': lits[int(which[0] * 4.0 + 0.001)],
+        'next': lits[int(which[1] * 4.0 + 0.001)],
+        'elapsed': putseconds(int((juliandate - phases[0]) * SECSPERDAY)),
+        'countdown': putseconds(int((phases[1] - juliandate) * SECSPERDAY)),
+    }
+
+
+def status_line(timestamp, fmt=DEFAULTFORMAT, lang=None, hemisphere='north'):
+    """ The status line at timestamp (Unix time)
+
+        Raise KeyError or ValueError if fmt is not a valid format.
+    """
+    return fmt.format(**status_fields(timestamp, lang, hemisphere))
+
+
+def parse_args(argv):
+    """ Parse a --status command line: return a dict of the options (and
+        'date'), or None if it needs more than this module understands.
+    """
+    args = {'format': DEFAULTFORMAT, 'language': None, 'hemisphere': 'north',
+            'accuracy': 'default', 'date': None}
+    argv = list(argv)
+    while argv:
+        arg = argv.pop(0)
+        name, equal, value = arg.partition('=')
+        if name in OPTIONS and (name.startswith('--') or not equal):
+            key = OPTIONS[name]
+            if key is None:
+                if equal:
+                    return None
+                continue
+            if not equal:
+                if not argv:
+                    return None
+                value = argv.pop(0)
+            args[key] = value
+        elif arg.startswith('-') and len(arg) > 1 or args['date'] is not None:
+            return None
+        else:
+            args['date'] = arg
+
+    if args['hemisphere'] not in ('north', 'south') or args['accuracy'] not in ACCURACIES:
+        return None
+    return args
+
+
+def main(argv):
+    """ Print the status line for argv.  Return False, without printing
+        anything, if argv must be handled by pyphoon's main() instead.
+    """
+    args = parse_args(argv)
+    if args is None:
+        return False
+
+    if args['date'] is None:
+        timestamp = time.time()
+    else:
+        try:
+            timestamp = parse_timestamp(args['date'])
+        except Exception:  # pylint: disable=broad-except
+            return False
+    set_accuracy(args['accuracy'])
+
+    try:
+        line = status_line(timestamp, args['format'], args['language'], args['hemisphere'])
+    except (KeyError, ValueError, IndexError) as err:
+        print(f"Invalid status format: {err}", file=sys.stderr)
+        sys.exit(1)
+    print(line)
+    return True